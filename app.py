@@ -1,11 +1,39 @@
-from flask import Flask, render_template, request
+import csv
+import io
+import json
+import math
+import os
+import threading
+import time
 
+from flask import Flask, Response, g, jsonify, render_template, request, stream_with_context
+
+from src.answer_cache import answer_cache_from_env
 from src.fx_provider import FrankfurterProvider
+from src.rate_store import RateStore
+from src.ledger import LedgerConverter, decode_lines
 from src.currency_agent import CurrencyAgent, Parser
+from src import llm_client, metrics
 
 app = Flask(__name__)
 
-agent = CurrencyAgent(provider=FrankfurterProvider(), parser=Parser())
+# FX_ONLY=1 arranca sin GROQ_API_KEY: solo conversiones, sin LLM.
+FX_ONLY = os.getenv("FX_ONLY", "0") == "1"
+if not FX_ONLY and not llm_client.is_configured():
+    raise RuntimeError(
+        "Falta la variable de entorno GROQ_API_KEY para usar el LLM de Groq "
+        "(usa FX_ONLY=1 para arrancar solo con la tool de FX)."
+    )
+
+# Serie local de tasas: consultas con fecha, respaldo sin conexión y arranque en caliente.
+provider = FrankfurterProvider(store=RateStore(os.getenv("FX_STORE_DIR", "data/fx_store")))
+answer_cache = answer_cache_from_env()
+agent = CurrencyAgent(
+    provider=provider,
+    parser=Parser(),
+    answer_cache=answer_cache,
+    llm_enabled=not FX_ONLY,
+)
 
 
 PRESETS = {
@@ -14,6 +42,41 @@ PRESETS = {
     "p3": "¿Qué significa tasa de cambio y por qué es importante en transacciones internacionales?",
 }
 
+# Pre-responde los presets conceptuales sin bloquear el arranque.
+if not FX_ONLY and os.getenv("LLM_WARMUP", "1") != "0":
+    threading.Thread(target=agent.warm_up, args=(list(PRESETS.values()),), daemon=True).start()
+
+
+# ---------------------------------------------------------------------------
+# Métricas: Server-Timing por petición y /metrics para Prometheus
+# ---------------------------------------------------------------------------
+metrics.register_service_gauges(provider, answer_cache)
+
+
+@app.before_request
+def _start_timing():
+    if metrics.enabled():
+        metrics.begin_request()
+        g.metrics_start = time.perf_counter()
+
+
+@app.after_request
+def _server_timing(response):
+    # En respuestas en streaming (SSE, CSV) cubre hasta el envío de cabeceras.
+    start = g.pop("metrics_start", None)
+    if start is None:
+        return response
+    total = time.perf_counter() - start
+    response.headers["Server-Timing"] = metrics.server_timing(metrics.end_request(), total)
+    metrics.HTTP_SECONDS.observe(total, request.endpoint or "not_found", str(response.status_code))
+    return response
+
+
+@app.route("/metrics")
+def prometheus_metrics():
+    """Métricas en formato de texto de Prometheus."""
+    return Response(metrics.REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
 
 @app.route("/", methods=["GET", "POST"])
 def index():
@@ -36,15 +99,156 @@ def index():
             used_tool = False
             fx_info = None
 
-    return render_template(
-        "index.html",
-        question=question,
-        answer=answer,
-        used_tool=used_tool,
-        fx_info=fx_info,
+    with metrics.stage("render"):
+        return render_template(
+            "index.html",
+            question=question,
+            answer=answer,
+            used_tool=used_tool,
+            fx_info=fx_info,
+        )
+
+
+@app.route("/api/ask/stream")
+def ask_stream():
+    """
+    Respuesta del agente como server-sent events (`?question=...` o `?preset=p1`).
+    Cada evento lleva su dato en JSON; ver `CurrencyAgent.answer_stream`.
+    """
+    preset = request.args.get("preset")
+    question = PRESETS[preset] if preset in PRESETS else request.args.get("question", "")
+    if not question.strip():
+        return jsonify(error="Se requiere 'question' o 'preset'."), 400
+
+    def events():
+        yield f"event: question\ndata: {json.dumps(question, ensure_ascii=False)}\n\n"
+        for event, data in agent.answer_stream(question):
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
+@app.route("/api/convert/batch", methods=["POST"])
+def convert_batch():
+    """
+    Conversión en lote. Cuerpo JSON:
+    {"amounts": [...], "from": "COP" | [...], "to": "USD" | [...]}
+    """
+    import numpy as np  # como en `rate_matrix`: solo el lote paga la importación
+
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify(error="El cuerpo debe ser un objeto JSON."), 400
+    amounts = payload.get("amounts")
+    from_codes = payload.get("from")
+    to_codes = payload.get("to")
+
+    if not isinstance(amounts, list) or not from_codes or not to_codes:
+        return jsonify(error="Se requieren 'amounts' (lista), 'from' y 'to'."), 400
+    if not all(map(_finite_amount, amounts)):
+        return jsonify(error="'amounts' debe contener solo números finitos."), 400
+    for field, codes in (("from", from_codes), ("to", to_codes)):
+        if not (isinstance(codes, str) or (isinstance(codes, list) and all(isinstance(c, str) for c in codes))):
+            return jsonify(error=f"'{field}' debe ser un código o una lista de códigos."), 400
+
+    # Primero la tabla (fallas del upstream -> 502), luego la conversión
+    # (monedas desconocidas o largos distintos -> 400).
+    try:
+        provider.rate_matrix()
+    except Exception as e:
+        return jsonify(error=f"No pude obtener las tasas de cambio. Detalle técnico: {e}"), 502
+    try:
+        with np.errstate(over="ignore"):  # el desborde se rechaza abajo
+            converted = provider.convert_many(amounts, from_codes, to_codes)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    if not np.isfinite(converted).all():
+        return jsonify(error="Algún monto convertido excede el rango de un número de punto flotante."), 400
+
+    return jsonify(converted=converted.tolist(), count=len(amounts))
+
+
+def _finite_amount(value) -> bool:
+    # bool es subclase de int; NaN/inf (o null, que NumPy vuelve NaN) no son
+    # montos, ni los enteros que no caben en un float.
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    try:
+        return math.isfinite(value)
+    except OverflowError:
+        return False
+
+
+@app.route("/api/ledger/convert", methods=["POST"])
+def convert_ledger():
+    """
+    Convierte un libro contable CSV a una moneda de reporte y lo devuelve en
+    streaming (respuesta chunked), sin cargar el archivo en memoria.
+
+    El CSV llega como archivo multipart (`file`) o como cuerpo crudo
+    (`Content-Type: text/csv`). Parámetros de query: `to` (obligatorio),
+    `amount_column`, `currency_column`, `output_column` y `decimal` ("." por
+    defecto, "," para montos como 1.234,56).
+    """
+    to_code = request.args.get("to", "").strip()
+    if not to_code:
+        return jsonify(error="Se requiere 'to' (moneda de reporte)."), 400
+
+    try:
+        converter = LedgerConverter(
+            provider,
+            to_code,
+            amount_column=request.args.get("amount_column", "amount"),
+            currency_column=request.args.get("currency_column", "currency"),
+            output_column=request.args.get("output_column") or None,
+            decimal=request.args.get("decimal", "."),
+        )
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    upload = request.files.get("file")
+    if upload is not None:
+        # Werkzeug cierra los archivos subidos al terminar la vista, antes de
+        # enviar la respuesta: nos quedamos con el stream y lo cerramos al final.
+        stream, upload.stream = upload.stream, io.BytesIO()
+    else:
+        stream = request.stream
+    blocks = converter.convert(decode_lines(stream))
+
+    # El primer bloque (encabezado + primeras filas) se produce aquí para que
+    # los errores de columnas o de tasas respondan con un código HTTP.
+    try:
+        first = next(blocks, "")
+    except (ValueError, csv.Error) as e:
+        stream.close()
+        return jsonify(error=str(e)), 400
+    except Exception as e:
+        stream.close()
+        return jsonify(error=f"No pude obtener las tasas de cambio. Detalle técnico: {e}"), 502
+
+    def body():
+        try:
+            yield first
+            yield from blocks
+        finally:
+            stream.close()
+
+    filename = f"ledger_{converter.to_code}.csv"
+    return Response(
+        stream_with_context(body()),
+        mimetype="text/csv",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            # Tabla usada: "live" o "snapshot" (sin conexión, última guardada).
+            "X-Rate-As-Of": converter.as_of.isoformat() if converter.as_of else "",
+            "X-Rate-Source": converter.source or "",
+        },
+    )
+
 
 if __name__ == "__main__":
     app.run(debug=True)
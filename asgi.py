@@ -0,0 +1,141 @@
+# asgi.py
+"""
+Punto de entrada ASGI con la ruta asíncrona del agente: un solo event loop
+atiende cientos de preguntas en vuelo sin dejar hilos bloqueados esperando
+a la API de FX o a Groq.
+
+    uvicorn asgi:app --port 8000
+
+Rutas:
+- POST /api/ask      {"question": "..."} -> {"answer", "used_tool", "fx_info"}
+- GET  /healthz
+- GET  /metrics      métricas en formato Prometheus (ver src/metrics.py)
+La interfaz HTML sigue servida por `app.py` (Flask).
+"""
+import json
+import os
+import time
+
+from src import llm_client, metrics
+from src.answer_cache import answer_cache_from_env
+from src.currency_agent import AsyncCurrencyAgent, Parser
+from src.fx_provider import AsyncFrankfurterProvider
+from src.rate_store import RateStore
+
+FX_ONLY = os.getenv("FX_ONLY", "0") == "1"
+if not FX_ONLY and not llm_client.is_configured():
+    raise RuntimeError(
+        "Falta la variable de entorno GROQ_API_KEY para usar el LLM de Groq "
+        "(usa FX_ONLY=1 para arrancar solo con la tool de FX)."
+    )
+
+# Serie local de tasas: consultas con fecha, respaldo sin conexión y arranque en caliente.
+provider = AsyncFrankfurterProvider(store=RateStore(os.getenv("FX_STORE_DIR", "data/fx_store")))
+answer_cache = answer_cache_from_env()
+agent = AsyncCurrencyAgent(
+    provider=provider,
+    parser=Parser(),
+    answer_cache=answer_cache,
+    llm_enabled=not FX_ONLY,
+)
+metrics.register_service_gauges(provider, answer_cache)
+
+
+async def _send(send, status: int, body: bytes, content_type: bytes) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", content_type),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_json(send, status: int, payload) -> None:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await _send(send, status, body, b"application/json; charset=utf-8")
+
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def _lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await provider.aclose()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+# Ruta -> etiqueta `endpoint` de fx_http_request_seconds (como los endpoints de Flask).
+_ENDPOINTS = {"/api/ask": "api_ask", "/healthz": "healthz", "/metrics": "metrics"}
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+    if not metrics.enabled():
+        await _route(scope, receive, send)
+        return
+
+    # Server-Timing y fx_http_request_seconds en todas las respuestas: se
+    # agregan al enviar las cabeceras, sea cual sea la ruta o el código.
+    metrics.begin_request()
+    start = time.perf_counter()
+
+    async def timed_send(message):
+        if message["type"] == "http.response.start":
+            total = time.perf_counter() - start
+            timing = metrics.server_timing(metrics.end_request(), total).encode()
+            message = {**message, "headers": [*message.get("headers", ()), (b"server-timing", timing)]}
+            endpoint = _ENDPOINTS.get(scope["path"], "not_found")
+            metrics.HTTP_SECONDS.observe(total, endpoint, str(message["status"]))
+        await send(message)
+
+    await _route(scope, receive, timed_send)
+
+
+async def _route(scope, receive, send) -> None:
+    method, path = scope["method"], scope["path"]
+
+    if method == "GET" and path == "/healthz":
+        await _send_json(send, 200, {"status": "ok"})
+        return
+
+    if method == "GET" and path == "/metrics":
+        body = metrics.REGISTRY.render().encode("utf-8")
+        await _send(send, 200, body, b"text/plain; version=0.0.4; charset=utf-8")
+        return
+
+    if path != "/api/ask":
+        await _send_json(send, 404, {"error": "Ruta no encontrada."})
+        return
+    if method != "POST":
+        await _send_json(send, 405, {"error": "Usa POST."})
+        return
+
+    try:
+        payload = json.loads(await _read_body(receive) or b"{}")
+    except ValueError:
+        payload = None
+    question = payload.get("question", "") if isinstance(payload, dict) else ""
+    if not isinstance(question, str) or not question.strip():
+        await _send_json(send, 400, {"error": "Se requiere 'question'."})
+        return
+
+    answer, used_tool, fx_info = await agent.answer(question)
+    await _send_json(send, 200, {"answer": answer, "used_tool": used_tool, "fx_info": fx_info})
@@ -0,0 +1,39 @@
+# bench/_common.py
+from __future__ import annotations
+
+import json
+import platform
+import time
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def write_results(name: str, payload: Dict, path: Optional[str] = None) -> Path:
+    """
+    Guarda el resultado de un benchmark como JSON legible por máquina, con la
+    marca de tiempo y la plataforma para poder comparar corridas.
+    """
+    out = Path(path) if path else RESULTS_DIR / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    doc = {
+        "benchmark": name,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": payload,
+    }
+    out.write_text(json.dumps(doc, indent=2, ensure_ascii=False), encoding="utf-8")
+    return out
+
+
+def percentiles(values: Sequence[float], points: Sequence[int] = (50, 95, 99)) -> Dict[str, float]:
+    """Percentiles por rango más cercano: {"p50": ..., "p95": ..., "p99": ...}."""
+    ordered = sorted(values)
+    if not ordered:
+        return {f"p{p}": float("nan") for p in points}
+    return {
+        f"p{p}": ordered[min(len(ordered) - 1, max(0, -(-p * len(ordered) // 100) - 1))]
+        for p in points
+    }
@@ -0,0 +1,88 @@
+# bench/bench_import.py
+"""
+Mide el arranque en frío de `app.py` con `python -X importtime` en procesos
+nuevos (modo FX_ONLY, sin pre-calentamiento) y reporta la mediana del tiempo
+acumulado de importación y los módulos más caros.
+
+Uso: python -m bench.bench_import [--runs 5] [--max-ms 400] [--out results.json]
+Con --max-ms el script sale con código 1 si la mediana supera el umbral, para
+detectar regresiones en CI.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from bench._common import write_results
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def import_profile(module: str) -> Tuple[Dict[str, int], float]:
+    """Ejecuta `import module` en un proceso nuevo; devuelve {módulo: µs acumulados} y el tiempo total."""
+    env = dict(os.environ, FX_ONLY="1", LLM_WARMUP="0")
+    env.pop("GROQ_API_KEY", None)
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+
+    cumulative: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cum_us, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(cum_us)
+    return cumulative, wall
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--module", default="app")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--max-ms", type=float, help="umbral de regresión para la mediana")
+    ap.add_argument("--out", help="ruta del JSON de resultados")
+    args = ap.parse_args()
+
+    totals: List[float] = []
+    walls: List[float] = []
+    last: Dict[str, int] = {}
+    for _ in range(args.runs):
+        last, wall = import_profile(args.module)
+        totals.append(last[args.module] / 1000)
+        walls.append(wall * 1000)
+
+    top = sorted(last.items(), key=lambda kv: kv[1], reverse=True)[1 : args.top + 1]
+    results = {
+        "module": args.module,
+        "runs": args.runs,
+        "import_ms_median": statistics.median(totals),
+        "import_ms_min": min(totals),
+        "process_ms_median": statistics.median(walls),
+        "top_modules_ms": {name: us / 1000 for name, us in top},
+        "groq_imported": "groq" in last,
+        "numpy_imported": "numpy" in last,
+    }
+
+    print(f"import {args.module}: mediana {results['import_ms_median']:.1f} ms "
+          f"(proceso {results['process_ms_median']:.1f} ms)")
+    for name, ms in results["top_modules_ms"].items():
+        print(f"  {ms:8.1f} ms  {name}")
+    print(f"-> {write_results('import', results, args.out)}")
+
+    if args.max_ms is not None and results["import_ms_median"] > args.max_ms:
+        print(f"REGRESIÓN: {results['import_ms_median']:.1f} ms > {args.max_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
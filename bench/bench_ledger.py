@@ -0,0 +1,116 @@
+# bench/bench_ledger.py
+"""
+Benchmark de la conversión en streaming de libros contables (`src/ledger.py`).
+
+Genera CSV sintéticos (COP/USD/EUR, montos con decimales) de varios tamaños y
+convierte cada uno con `python -m src.ledger` en un proceso nuevo contra el
+stub local de la API de FX. Reporta filas/s y el pico de RSS del proceso
+(`ru_maxrss` medido por el propio hijo); con memoria constante el pico debe
+ser el mismo para 1M que para 10M filas.
+
+Uso: python -m bench.bench_ledger [--rows 10000000] [--sizes 1000000,10000000]
+                                  [--to USD] [--keep DIR] [--out results.json]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from bench._common import write_results
+from bench.stubs import FxStubServer
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_PROJECTS = ["Parque eólico Guajira", "Solar Atlántico", "Mina Cesar", "Gas Caribe", "Hidro Antioquia"]
+_CURRENCIES = [("COP", 4_000_000.0), ("USD", 1_000.0), ("EUR", 900.0)]
+
+
+def write_ledger(path: Path, rows: int, seed: int = 7) -> int:
+    """Escribe un CSV sintético de `rows` filas por bloques; devuelve su tamaño en bytes."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("date,project,concept,amount,currency\n")
+        block: List[str] = []
+        for i in range(rows):
+            code, scale = _CURRENCIES[i % 3]
+            block.append(
+                f"2026-{i % 12 + 1:02d}-{i % 28 + 1:02d},{_PROJECTS[i % 5]},"
+                f"{'ingreso' if i % 2 else 'deuda'},{rng.random() * scale:.2f},{code}\n"
+            )
+            if len(block) == 100_000:
+                f.write("".join(block))
+                block.clear()
+        f.write("".join(block))
+    return path.stat().st_size
+
+
+_CHILD = (
+    "import resource, sys\n"
+    "from src.ledger import main\n"
+    "code = main(sys.argv[1:])\n"
+    "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, file=sys.stderr)\n"
+    "sys.exit(code)\n"
+)
+
+
+def run_conversion(path: Path, to_code: str, fx_url: str) -> Dict:
+    """Convierte `path` en un proceso nuevo; devuelve tiempo, filas/s y pico de RSS."""
+    env = dict(os.environ, FX_BASE_URL=fx_url, FX_STORE_DIR=str(path.parent / "fx_store"))
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", _CHILD, str(path), "--to", to_code, "-o", os.devnull],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    elapsed = time.perf_counter() - start
+    # stderr: "<filas> filas convertidas ..." y luego ru_maxrss del hijo (KB en Linux).
+    lines = proc.stderr.split("\n")
+    rows = int(lines[0].split()[0])
+    peak_kb = int(lines[1])
+    return {
+        "rows": rows,
+        "elapsed_s": elapsed,
+        "rows_per_s": rows / elapsed,
+        "peak_rss_mb": peak_kb / 1024,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--rows", type=int, default=10_000_000, help="tamaño mayor del CSV sintético")
+    ap.add_argument("--sizes", help="tamaños separados por coma (por defecto rows/10 y rows)")
+    ap.add_argument("--to", default="USD")
+    ap.add_argument("--keep", help="directorio donde dejar los CSV generados")
+    ap.add_argument("--out", help="ruta del JSON de resultados")
+    args = ap.parse_args()
+
+    sizes = sorted(int(s) for s in args.sizes.split(",")) if args.sizes else [args.rows // 10, args.rows]
+    workdir = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix="ledger-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    runs = []
+    with FxStubServer() as fx:
+        for rows in sizes:
+            path = workdir / f"ledger_{rows}.csv"
+            size = write_ledger(path, rows)
+            result = run_conversion(path, args.to, fx.base_url)
+            result["file_mb"] = size / 1e6
+            runs.append(result)
+            print(
+                f"{rows:>11,} filas ({result['file_mb']:7.1f} MB): "
+                f"{result['rows_per_s']:10,.0f} filas/s, pico RSS {result['peak_rss_mb']:6.1f} MB"
+            )
+            if not args.keep:
+                path.unlink()
+
+    print(f"-> {write_results('ledger', {'to': args.to, 'runs': runs}, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# bench/bench_metrics.py
+"""
+Costo de la instrumentación (`src/metrics.py`) con métricas apagadas y
+encendidas:
+- `stage()` aislado (ns por etapa) frente a un bloque vacío,
+- `CurrencyAgent.answer` de conversión con la tabla ya en caché (el caso más
+  barato, donde el overhead pesa más),
+- la ruta `/` de Flask vía `test_client` (incluye los hooks de Server-Timing).
+
+Contra el stub local de la API de FX, sin LLM (modo FX_ONLY).
+
+Uso: python -m bench.bench_metrics [--repeat 20000] [--requests 2000] [--rounds 7]
+                                   [--out results.json]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import time
+from typing import Callable, Dict
+
+from bench._common import write_results
+from bench.stubs import FxStubServer
+
+
+def per_call_ns(fn: Callable[[], object], n: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter_ns() - start) / n
+
+
+def compare(fn: Callable[[], object], n: int, rounds: int) -> Dict[str, float]:
+    """
+    ns por llamada con métricas apagadas y encendidas. Las corridas se
+    intercalan (off, on, off, on...) y se toma la mediana de cada lado, para
+    que la deriva de la máquina no se confunda con el overhead.
+    """
+    from src import metrics
+
+    samples: Dict[str, list] = {"disabled": [], "enabled": []}
+    for _ in range(rounds):
+        for label, on in (("disabled", False), ("enabled", True)):
+            metrics.set_enabled(on)
+            samples[label].append(per_call_ns(fn, n))
+    return {label: statistics.median(values) for label, values in samples.items()}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--repeat", type=int, default=20_000, help="llamadas por corrida (stage y answer)")
+    ap.add_argument("--requests", type=int, default=2_000, help="peticiones por corrida a la ruta /")
+    ap.add_argument("--rounds", type=int, default=7, help="corridas intercaladas por modo")
+    ap.add_argument("--out", help="ruta del JSON de resultados")
+    args = ap.parse_args()
+
+    with FxStubServer() as fx:
+        os.environ.update(FX_BASE_URL=fx.base_url, FX_ONLY="1", LLM_WARMUP="0")
+        os.environ.setdefault("FX_STORE_DIR", os.path.join("bench", "results", "fx_store"))
+
+        from src import metrics
+        import app as flask_app
+
+        agent = flask_app.agent
+        question = "¿Cuánto son 100 USD en COP?"
+        agent.answer(question)  # carga la tabla pivote
+        client = flask_app.app.test_client()
+
+        def bare():
+            pass
+
+        def staged():
+            with metrics.stage("bench"):
+                pass
+
+        def answer():
+            agent.answer(question)
+
+        def index():
+            client.post("/", data={"question": question})
+
+        stage_ns = compare(staged, args.repeat, args.rounds)
+        answer_ns = compare(answer, args.repeat, args.rounds)
+        index_ns = compare(index, args.requests, args.rounds)
+        results: Dict[str, Dict[str, float]] = {"baseline": {"empty_call_ns": per_call_ns(bare, args.repeat)}}
+        for label in ("disabled", "enabled"):
+            results[label] = {
+                "stage_ns": stage_ns[label],
+                "answer_us": answer_ns[label] / 1000,
+                "index_us": index_ns[label] / 1000,
+            }
+
+    off, on = results["disabled"], results["enabled"]
+    results["enabled_overhead"] = {
+        "answer_pct": 100 * (on["answer_us"] / off["answer_us"] - 1),
+        "index_pct": 100 * (on["index_us"] / off["index_us"] - 1),
+    }
+    # Apagadas, cada respuesta de conversión pasa por 3 stage() (parse, fx, render).
+    results["disabled_overhead_pct_of_index"] = (
+        100 * 3 * (off["stage_ns"] - results["baseline"]["empty_call_ns"]) / 1000 / off["index_us"]
+    )
+
+    print(f"llamada vacía:        {results['baseline']['empty_call_ns']:8.0f} ns")
+    for label in ("disabled", "enabled"):
+        r = results[label]
+        print(
+            f"{label:<9} stage(): {r['stage_ns']:8.0f} ns | answer: {r['answer_us']:7.1f} µs"
+            f" | POST /: {r['index_us']:7.1f} µs"
+        )
+    print(
+        f"encendidas: +{results['enabled_overhead']['answer_pct']:.1f}% en answer,"
+        f" +{results['enabled_overhead']['index_pct']:.1f}% en POST /"
+    )
+    print(f"apagadas: ~{results['disabled_overhead_pct_of_index']:.3f}% de POST /")
+    print(f"-> {write_results('metrics', results, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# bench/bench_parser.py
+"""
+Compara el `Parser` actual (extractor compilado en una pasada) con el parser
+original de escaneos repetidos, sobre el corpus etiquetado:
+- exactitud (preguntas interpretadas igual que la etiqueta) y de
+  `is_conceptual` sobre `CONCEPT_CORPUS`,
+- throughput (preguntas/s) con el vocabulario original y con todos los ISO.
+
+Uso: python -m bench.bench_parser [--repeat 200] [--out results.json]
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from bench._common import write_results
+from bench.parser_corpus import CONCEPT_CORPUS, CORPUS
+from src.currency_agent import NAME_TO_CODE, SUPPORTED_CODES, Parser
+from src.extractor import ISO_CODES, CurrencyExtractor
+
+
+class LegacyParser:
+    """Parser original (substrings + regex sin cachear), con vocabulario configurable."""
+
+    def __init__(self, names: Dict[str, str], codes: Sequence[str]):
+        self.names = names
+        self.codes = list(codes)
+        self.dest_pattern = r"(?:en|a)\s+(" + "|".join(c.lower() for c in self.codes) + r")"
+
+    def _find_amount(self, text: str) -> Optional[float]:
+        m = re.search(r"(\d[\d\.\,]*)", text)
+        if not m:
+            return None
+        raw = m.group(1).replace(".", "").replace(",", ".")
+        try:
+            return float(raw)
+        except ValueError:
+            return None
+
+    def _find_currency_codes(self, text: str) -> List[str]:
+        codes: List[str] = []
+        text_lower = text.lower()
+        for name, code in self.names.items():
+            if name in text_lower and code not in codes:
+                codes.append(code)
+        up = text.upper()
+        for code in self.codes:
+            if code in up:
+                codes.append(code)
+        return list(dict.fromkeys(codes))
+
+    def parse(self, question: str) -> Optional[Tuple[float, str, str]]:
+        q = question.lower()
+        amount = self._find_amount(q)
+        codes = self._find_currency_codes(q)
+        if amount is not None:
+            m_dest = re.search(self.dest_pattern, q)
+            if m_dest:
+                to_code = m_dest.group(1).upper()
+                for c in codes:
+                    if c != to_code:
+                        return amount, c, to_code
+            if len(codes) >= 2:
+                return amount, codes[0], codes[1]
+            return None
+        if len(codes) >= 2:
+            return 1.0, codes[0], codes[1]
+        return None
+
+
+def accuracy(parser) -> Dict:
+    misses = [q for q, expected in CORPUS if parser.parse(q) != expected]
+    return {"correct": len(CORPUS) - len(misses), "total": len(CORPUS), "misses": misses}
+
+
+def concept_accuracy(parser: Parser) -> Dict:
+    misses = [q for q, expected in CONCEPT_CORPUS if parser.is_conceptual(q) != expected]
+    return {"correct": len(CONCEPT_CORPUS) - len(misses), "total": len(CONCEPT_CORPUS), "misses": misses}
+
+
+def throughput(parser, repeat: int) -> float:
+    questions = [q for q, _ in CORPUS]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for q in questions:
+            parser.parse(q)
+    return repeat * len(questions) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--repeat", type=int, default=200)
+    ap.add_argument("--out", help="ruta del JSON de resultados")
+    args = ap.parse_args()
+
+    legacy_names = {name: code for name, code in list(NAME_TO_CODE.items())[:16]}
+    parsers = {
+        "legacy_supported": LegacyParser(legacy_names, SUPPORTED_CODES),
+        "legacy_all_iso": LegacyParser(NAME_TO_CODE, ISO_CODES),
+        "compiled_supported": Parser(CurrencyExtractor(legacy_names, codes=SUPPORTED_CODES, ci_codes=SUPPORTED_CODES)),
+        "compiled_all_iso": Parser(),
+    }
+
+    results = {}
+    for name, parser in parsers.items():
+        acc = accuracy(parser)
+        qps = throughput(parser, args.repeat)
+        results[name] = {"accuracy": acc, "questions_per_s": qps}
+        print(f"{name:20s} exactitud {acc['correct']}/{acc['total']}  {qps:,.0f} preguntas/s")
+
+    concept = concept_accuracy(parsers["compiled_all_iso"])
+    results["is_conceptual"] = concept
+    print(f"{'is_conceptual':20s} exactitud {concept['correct']}/{concept['total']}")
+
+    print(f"-> {write_results('parser', results, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# bench/bench_transport.py
+"""
+Ejercita el transporte HTTP de la tool de FX contra un stub local:
+- coalescencia single-flight con muchos hilos en frío,
+- pool keep-alive frente a `requests.get` suelto,
+- reintentos con errores inyectados y apertura del circuit breaker.
+
+Uso: python -m bench.bench_transport [--out results.json]
+"""
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+
+import requests
+
+from bench._common import write_results
+from bench.stubs import FxStubServer
+from src.fx_provider import FrankfurterProvider
+from src.http_transport import CircuitBreaker, CircuitOpenError, HttpTransport
+
+
+def bench_coalescing(threads: int = 64) -> dict:
+    with FxStubServer(latency=0.2) as stub:
+        provider = FrankfurterProvider(base_url=stub.base_url)
+        barrier = threading.Barrier(threads)
+
+        def worker():
+            barrier.wait()
+            provider.convert(1000, "COP", "AUD")
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        start = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        return {
+            "threads": threads,
+            "upstream_requests": stub.requests,
+            "elapsed_s": time.perf_counter() - start,
+        }
+
+
+def bench_pooling(n: int = 200) -> dict:
+    with FxStubServer() as stub:
+        url = f"{stub.base_url}/USD"
+
+        start = time.perf_counter()
+        for _ in range(n):
+            requests.get(url, timeout=20).json()
+        unpooled = time.perf_counter() - start
+
+        transport = HttpTransport()
+        start = time.perf_counter()
+        for _ in range(n):
+            transport.get_json(url)
+        pooled = time.perf_counter() - start
+
+    return {
+        "requests": n,
+        "unpooled_ms_per_req": unpooled / n * 1000,
+        "pooled_ms_per_req": pooled / n * 1000,
+    }
+
+
+def bench_faults(n: int = 100) -> dict:
+    with FxStubServer(error_rate=0.3, seed=7) as stub:
+        transport = HttpTransport(retries=2, backoff=0.01)
+        ok = 0
+        for _ in range(n):
+            try:
+                transport.get_json(f"{stub.base_url}/USD")
+                ok += 1
+            except Exception:
+                pass
+        flaky = {"calls": n, "succeeded": ok, "upstream_requests": stub.requests}
+
+    with FxStubServer() as stub:
+        stub.down = True
+        transport = HttpTransport(retries=1, backoff=0.01, breaker=CircuitBreaker(failure_threshold=3))
+        fast_fail = 0
+        start = time.perf_counter()
+        for _ in range(n):
+            try:
+                transport.get_json(f"{stub.base_url}/USD")
+            except CircuitOpenError:
+                fast_fail += 1
+            except Exception:
+                pass
+        down = {
+            "calls": n,
+            "failed_fast": fast_fail,
+            "upstream_requests": stub.requests,
+            "elapsed_s": time.perf_counter() - start,
+            "breaker_state": transport.breaker.state,
+        }
+
+    return {"error_rate_0.3": flaky, "upstream_down": down}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--out", help="ruta del JSON de resultados")
+    args = ap.parse_args()
+
+    results = {
+        "coalescing": bench_coalescing(),
+        "pooling": bench_pooling(),
+        "faults": bench_faults(),
+    }
+    for name, value in results.items():
+        print(f"{name}: {value}")
+    print(f"-> {write_results('transport', results, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# bench/load_async.py
+"""
+Prueba de carga de la ruta síncrona frente a la asíncrona del agente, contra
+stubs locales de la API de FX y de Groq con latencia inyectada.
+
+- sync: `CurrencyAgent.answer` en un pool de N hilos (como workers de Flask).
+- async: `AsyncCurrencyAgent.answer` con hasta C preguntas en vuelo en un loop.
+
+Uso: python -m bench.load_async [--questions 400] [--threads 8] [--concurrency 200]
+                                [--fx-latency 0.05] [--llm-latency 0.3] [--out results.json]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from bench._common import write_results
+from bench.stubs import FxStubServer, GroqStubServer
+
+
+def make_questions(n: int) -> List[str]:
+    # Mezcla: conversiones, conceptuales distintas (sin caché) y mixtas.
+    kinds = [
+        "¿Cuánto son {i} USD en COP?",
+        "¿Qué es el riesgo cambiario en el proyecto solar número {i}?",
+        "¿Qué significa que {i} EUR equivalgan a tantos COP en un contrato de gas?",
+    ]
+    return [kinds[i % len(kinds)].format(i=i + 1) for i in range(n)]
+
+
+def run_sync(questions: List[str], threads: int, fx_url: str) -> Dict:
+    from src.currency_agent import CurrencyAgent, Parser
+    from src.fx_provider import FrankfurterProvider
+    from src.http_transport import HttpTransport
+
+    agent = CurrencyAgent(
+        provider=FrankfurterProvider(base_url=fx_url, transport=HttpTransport(pool_size=threads)),
+        parser=Parser(),
+    )
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(agent.answer, questions))
+    elapsed = time.perf_counter() - start
+    return {"threads": threads, "elapsed_s": elapsed, "questions_per_s": len(questions) / elapsed}
+
+
+async def _run_async(questions: List[str], concurrency: int, fx_url: str) -> Dict:
+    from src.currency_agent import AsyncCurrencyAgent, Parser
+    from src.fx_provider import AsyncFrankfurterProvider
+
+    provider = AsyncFrankfurterProvider(base_url=fx_url)
+    agent = AsyncCurrencyAgent(provider=provider, parser=Parser())
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(question: str):
+        async with semaphore:
+            return await agent.answer(question)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in questions))
+    elapsed = time.perf_counter() - start
+    await provider.aclose()
+    return {"concurrency": concurrency, "elapsed_s": elapsed, "questions_per_s": len(questions) / elapsed}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--questions", type=int, default=400)
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--concurrency", type=int, default=200)
+    ap.add_argument("--fx-latency", type=float, default=0.05)
+    ap.add_argument("--llm-latency", type=float, default=0.3)
+    ap.add_argument("--out", help="ruta del JSON de resultados")
+    args = ap.parse_args()
+
+    questions = make_questions(args.questions)
+    with FxStubServer(latency=args.fx_latency) as fx, GroqStubServer(latency=args.llm_latency) as groq:
+        os.environ["GROQ_BASE_URL"] = groq.url
+        os.environ.setdefault("GROQ_API_KEY", "stub")
+
+        sync = run_sync(questions, args.threads, fx.base_url)
+        async_ = asyncio.run(_run_async(questions, args.concurrency, fx.base_url))
+
+    results = {
+        "questions": args.questions,
+        "fx_latency_s": args.fx_latency,
+        "llm_latency_s": args.llm_latency,
+        "sync": sync,
+        "async": async_,
+        "speedup": async_["questions_per_s"] / sync["questions_per_s"],
+    }
+    print(f"sync  ({args.threads} hilos):      {sync['questions_per_s']:8.1f} preguntas/s")
+    print(f"async ({args.concurrency} en vuelo): {async_['questions_per_s']:8.1f} preguntas/s")
+    print(f"mejora: x{results['speedup']:.1f}")
+    print(f"-> {write_results('load_async', results, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# bench/load_flask.py
+"""
+Prueba de carga de punta a punta de la ruta `index` de Flask (`POST /`) contra
+los stubs locales de FX y Groq, en una grilla de procesos × hilos.
+
+Cada configuración levanta `app.app` en P procesos (fork) que comparten el
+socket de escucha, cada uno con un pool de T hilos (como `gunicorn --workers P
+--threads T`). Un generador de carga con C conexiones concurrentes envía
+durante `--duration` segundos una mezcla de preguntas de conversión y
+conceptuales (distintas entre sí, así que no las salva la caché del LLM) y se
+reportan p50/p95/p99 de latencia y peticiones/s.
+
+Uso: python -m bench.load_flask [--processes 1,2] [--threads 1,4,16] [--concurrency 32]
+                                [--duration 5] [--warmup 1] [--llm-share 0.3]
+                                [--fx-latency 0.05] [--llm-latency 0.3] [--jitter 0.01]
+                                [--error-rate 0] [--out results.json]
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import itertools
+import logging
+import multiprocessing
+import os
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from werkzeug.serving import BaseWSGIServer
+
+from bench._common import percentiles, write_results
+from bench.stubs import FxStubServer, GroqStubServer
+
+_TOOL_QUESTIONS = [
+    "¿Cuánto son {i} USD en COP?",
+    "¿Cuál es el valor de {i} COP en USD hoy?",
+    "¿Cuánto equivalen {i} EUR en COP con la tasa actual?",
+]
+_LLM_QUESTION = "¿Qué es el riesgo cambiario en el proyecto solar número {i}?"
+
+
+def question_source(llm_share: float) -> Callable[[], str]:
+    """Generador de preguntas: `llm_share` de ellas conceptuales, todas distintas."""
+    counter = itertools.count(1)
+    llm_every = round(1 / llm_share) if llm_share > 0 else 0
+
+    def next_question() -> str:
+        i = next(counter)
+        if llm_every and i % llm_every == 0:
+            return _LLM_QUESTION.format(i=i)
+        return _TOOL_QUESTIONS[i % len(_TOOL_QUESTIONS)].format(i=i)
+
+    return next_question
+
+
+class _PooledWSGIServer(BaseWSGIServer):
+    """Servidor WSGI de werkzeug con un pool fijo de hilos por proceso."""
+
+    multithread = True  # HTTP/1.1 en el handler, como el servidor con hilos
+
+    def __init__(self, sock: socket.socket, app, threads: int):
+        host, port = sock.getsockname()[:2]
+        super().__init__(host, port, app, fd=sock.fileno())
+        self._pool = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address) -> None:
+        self._pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def _serve(sock: socket.socket, threads: int, env: Dict[str, str]) -> None:
+    # Proceso hijo: importa la app con su propio entorno y atiende el socket compartido.
+    os.environ.update(env)
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    import app as flask_app
+
+    _PooledWSGIServer(sock, flask_app.app, threads).serve_forever()
+
+
+def _post(host: str, port: int, question: str) -> Optional[int]:
+    body = urlencode({"question": question}).encode("utf-8")
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    try:
+        conn.request("POST", "/", body, {
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Connection": "close",
+        })
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    except OSError:
+        return None
+    finally:
+        conn.close()
+
+
+def drive_load(
+    host: str, port: int, concurrency: int, duration: float, next_question: Callable[[], str]
+) -> Tuple[List[float], int, float]:
+    """C hilos enviando peticiones sin pausa durante `duration` s: (latencias OK, errores, segundos)."""
+    deadline = time.perf_counter() + duration
+    latencies: List[List[float]] = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+
+    def worker(slot: int) -> None:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status = _post(host, port, next_question())
+            if status == 200:
+                latencies[slot].append(time.perf_counter() - start)
+            else:
+                errors[slot] += 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return [x for slot in latencies for x in slot], sum(errors), elapsed
+
+
+def run_config(processes: int, threads: int, args, env: Dict[str, str], store_root: str) -> Dict:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(1024)
+    host, port = sock.getsockname()[:2]
+
+    ctx = multiprocessing.get_context("fork")
+    workers = []
+    for i in range(processes):
+        # Los procesos de una configuración comparten el almacén de tasas, como en gunicorn.
+        child_env = dict(env, FX_STORE_DIR=os.path.join(store_root, f"p{processes}-t{threads}"))
+        proc = ctx.Process(target=_serve, args=(sock, threads, child_env), daemon=True)
+        proc.start()
+        workers.append(proc)
+
+    try:
+        next_question = question_source(args.llm_share)
+        if args.warmup:
+            drive_load(host, port, args.concurrency, args.warmup, next_question)
+        latencies, errors, elapsed = drive_load(host, port, args.concurrency, args.duration, next_question)
+    finally:
+        for proc in workers:
+            proc.terminate()
+        for proc in workers:
+            proc.join()
+        sock.close()
+
+    ms = [x * 1000 for x in latencies]
+    return {
+        "processes": processes,
+        "threads": threads,
+        "concurrency": args.concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_s": len(latencies) / elapsed,
+        "latency_ms": {**percentiles(ms), "mean": sum(ms) / len(ms) if ms else float("nan")},
+    }
+
+
+def _ints(text: str) -> List[int]:
+    return [int(x) for x in text.split(",") if x]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--processes", type=_ints, default=[1, 2])
+    ap.add_argument("--threads", type=_ints, default=[1, 4, 16])
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--duration", type=float, default=5.0, help="segundos medidos por configuración")
+    ap.add_argument("--warmup", type=float, default=1.0, help="segundos de carga previa sin medir")
+    ap.add_argument("--llm-share", type=float, default=0.3, help="fracción de preguntas conceptuales")
+    ap.add_argument("--fx-latency", type=float, default=0.05)
+    ap.add_argument("--llm-latency", type=float, default=0.3)
+    ap.add_argument("--jitter", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fracción de 503 en ambos stubs")
+    ap.add_argument("--out", help="ruta del JSON de resultados")
+    args = ap.parse_args()
+
+    common = dict(jitter=args.jitter, error_rate=args.error_rate, seed=1)
+    runs = []
+    with FxStubServer(latency=args.fx_latency, **common) as fx, \
+            GroqStubServer(latency=args.llm_latency, **common) as groq, \
+            tempfile.TemporaryDirectory(prefix="load-flask-") as store_root:
+        env = {
+            "FX_BASE_URL": fx.base_url,
+            "GROQ_BASE_URL": groq.url,
+            "GROQ_API_KEY": "stub",
+            "LLM_WARMUP": "0",
+        }
+        print(f"{'procesos':>8} {'hilos':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errores':>7}")
+        for processes in args.processes:
+            for threads in args.threads:
+                result = run_config(processes, threads, args, env, store_root)
+                runs.append(result)
+                lat = result["latency_ms"]
+                print(
+                    f"{processes:>8} {threads:>5} {result['requests_per_s']:8.1f} "
+                    f"{lat['p50']:8.1f} {lat['p95']:8.1f} {lat['p99']:8.1f} {result['errors']:>7}"
+                )
+
+    config = {
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "llm_share": args.llm_share,
+        "fx_latency_s": args.fx_latency,
+        "llm_latency_s": args.llm_latency,
+        "jitter_s": args.jitter,
+        "error_rate": args.error_rate,
+    }
+    print(f"-> {write_results('load_flask', {'config': config, 'runs': runs}, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
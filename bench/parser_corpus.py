@@ -0,0 +1,88 @@
+# bench/parser_corpus.py
+"""
+Corpus etiquetado de preguntas en español para medir exactitud y throughput
+del `Parser`. Cada entrada es (pregunta, esperado), donde esperado es
+(monto, origen, destino) o None si la pregunta es conceptual.
+
+`CONCEPT_CORPUS` etiqueta `Parser.is_conceptual`: True si la pregunta pide una
+explicación (y en las conversiones, la ruta mixta con el LLM).
+"""
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+Expected = Optional[Tuple[float, str, str]]
+
+CORPUS: List[Tuple[str, Expected]] = [
+    # Presets de la demo
+    ("¿Cuál es el valor de 10000 COP en USD hoy?", (10000.0, "COP", "USD")),
+    ("¿Cuánto equivalen 500 EUR en COP con la tasa actual?", (500.0, "EUR", "COP")),
+    ("¿Qué significa tasa de cambio y por qué es importante en transacciones internacionales?", None),
+    # Códigos ISO, distintos formatos de monto
+    ("¿Cuánto es 1000 COP en AUD?", (1000.0, "COP", "AUD")),
+    ("Convierte 250 USD a EUR", (250.0, "USD", "EUR")),
+    ("convierte 1.000,50 eur a cop", (1000.5, "EUR", "COP")),
+    ("¿Cuánto son 10,000 COP en USD?", (10000.0, "COP", "USD")),
+    ("¿Cuál es el valor de 10.000 COP en USD?", (10000.0, "COP", "USD")),
+    ("Pasa 2.5 GBP a USD", (2.5, "GBP", "USD")),
+    ("¿3500000 CLP cuántos USD son?", (3500000.0, "CLP", "USD")),
+    ("Necesito 1,234,567.89 MXN en USD", (1234567.89, "MXN", "USD")),
+    ("Tengo 75 BRL, ¿cuánto sería en ARS?", (75.0, "BRL", "ARS")),
+    ("¿A cuánto equivalen 1200 PEN en USD?", (1200.0, "PEN", "USD")),
+    ("¿Y 150USD en COP?", (150.0, "USD", "COP")),
+    ("Cambio de 900 AUD a GBP por favor", (900.0, "AUD", "GBP")),
+    ("¿Cuántos EUR son 42 USD?", (42.0, "USD", "EUR")),
+    ("Convierte 10 usd a mxn", (10.0, "USD", "MXN")),
+    # Nombres en español
+    ("¿Cuánto valen 500 pesos colombianos en dólares australianos?", (500.0, "COP", "AUD")),
+    ("Convierte 100 libras esterlinas a pesos mexicanos", (100.0, "GBP", "MXN")),
+    ("¿Cuánto son 2000 reales brasileños en pesos argentinos?", (2000.0, "BRL", "ARS")),
+    ("¿Cuánto es 1 sol peruano en pesos chilenos?", (1.0, "PEN", "CLP")),
+    ("¿Cuánto son 300 soles peruanos en USD?", (300.0, "PEN", "USD")),
+    ("Pasa 50 dolares australianos a pesos colombianos", (50.0, "AUD", "COP")),
+    ("¿Cuánto son 20000 yenes japoneses en dólares estadounidenses?", (20000.0, "JPY", "USD")),
+    ("1000 francos suizos en EUR", (1000.0, "CHF", "EUR")),
+    ("¿Cuántos pesos uruguayos son 80 USD?", (80.0, "USD", "UYU")),
+    # Códigos fuera de los 10 soportados (solo en mayúsculas)
+    ("¿Cuánto son 100 JPY en COP?", (100.0, "JPY", "COP")),
+    ("Convierte 5000 INR a USD", (5000.0, "INR", "USD")),
+    ("¿Cuánto es 1 CAD en CHF?", (1.0, "CAD", "CHF")),
+    # Sin monto: una unidad
+    ("¿Cómo está el USD frente al COP?", (1.0, "USD", "COP")),
+    ("Tasa EUR GBP", (1.0, "EUR", "GBP")),
+    # Conceptuales o incompletas
+    ("¿Qué es el riesgo cambiario en un parque eólico?", None),
+    ("Explica por qué el dólar afecta la deuda de un proyecto solar", None),
+    ("¿Cómo cubrir la exposición en COP de un proyecto minero?", None),
+    ("El pago está PENDIENTE desde hace 3 días", None),
+    ("¿Qué pasa con la tasa de interés en 2025?", None),
+    ("Tengo 500 COP", None),
+    ("¿Qué significa SOS en un contrato?", None),
+    ("Los PARSERS de texto son útiles", None),
+    ("¿Es buen momento para invertir en energía solar?", None),
+    ("Top 10 riesgos de un proyecto de petróleo y gas", None),
+    ("¿Por qué sube el dólar?", None),
+]
+
+CONCEPT_CORPUS: List[Tuple[str, bool]] = [
+    # Conversiones sin pedido de explicación: solo la tool
+    ("¿Qué es 100 USD en COP?", False),
+    ("que es 2.500 EUR en USD", False),
+    ("¿Qué es $50 en pesos mexicanos?", False),
+    ("Convierte 100 USD a COP porque lo necesito", False),
+    ("¿Cuánto es 1000 COP en AUD?", False),
+    ("Pasa 2.5 GBP a USD", False),
+    ("¿Cómo está el USD frente al COP?", False),
+    ("¿Qué esquema de pago conviene? 500 USD en COP", False),
+    # Conversiones que además piden un concepto: ruta mixta
+    ("¿Cuánto son 100 USD en COP y qué es la tasa de cambio?", True),
+    ("Convierte 500 EUR a COP y explícame el riesgo cambiario", True),
+    ("¿Por qué 1 USD vale 4000 COP?", True),
+    ("¿Cómo afecta pasar 1000 USD a COP en mi flujo de caja?", True),
+    # Conceptuales
+    ("¿Qué es el riesgo cambiario en un parque eólico?", True),
+    ("¿Qué es una cobertura cambiaria?", True),
+    ("¿porqué sube el dólar?", True),
+    ("¿Qué significa tasa de cambio?", True),
+    ("¿Qué pasa con la tasa de interés en 2025?", True),
+]
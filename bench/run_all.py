@@ -0,0 +1,80 @@
+# bench/run_all.py
+"""
+Corre la suite de benchmarks completa, cada uno en un proceso nuevo contra los
+stubs locales, y junta sus resultados en un solo JSON
+(`bench/results/suite-<fecha>.json`) para comparar corridas en el tiempo.
+
+Uso: python -m bench.run_all [--quick] [--only parser,load_flask] [--skip ledger]
+                             [--out results.json]
+Sale con código 1 si algún benchmark falla (los demás se corren igual).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from bench._common import write_results
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# nombre -> (módulo y argumentos, argumentos extra con --quick)
+SUITE: Dict[str, Tuple[List[str], List[str]]] = {
+    "parser": (["bench.bench_parser"], ["--repeat", "50"]),
+    "import": (["bench.bench_import", "--runs", "5"], ["--runs", "3"]),
+    "transport": (["bench.bench_transport"], []),
+    "metrics": (["bench.bench_metrics"], ["--repeat", "5000", "--requests", "300", "--rounds", "3"]),
+    "load_async": (["bench.load_async"], ["--questions", "200"]),
+    "load_flask": (["bench.load_flask"], ["--threads", "1,8", "--duration", "3"]),
+    "ledger": (["bench.bench_ledger", "--sizes", "1000000,10000000"], ["--sizes", "100000,1000000"]),
+}
+
+
+def run_one(name: str, command: List[str], out: Path) -> Dict:
+    print(f"== {name}: python -m {' '.join(command)}", flush=True)
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-m", *command, "--out", str(out)], cwd=ROOT)
+    entry: Dict = {
+        "command": command,
+        "returncode": proc.returncode,
+        "elapsed_s": time.perf_counter() - start,
+    }
+    if out.exists():
+        entry["results"] = json.loads(out.read_text(encoding="utf-8"))["results"]
+    return entry
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--quick", action="store_true", help="tamaños reducidos (unos pocos minutos)")
+    ap.add_argument("--only", help=f"benchmarks a correr, separados por coma ({','.join(SUITE)})")
+    ap.add_argument("--skip", default="", help="benchmarks a omitir, separados por coma")
+    ap.add_argument("--out", help="ruta del JSON combinado")
+    args = ap.parse_args()
+
+    names = args.only.split(",") if args.only else list(SUITE)
+    unknown = [n for n in names + args.skip.split(",") if n and n not in SUITE]
+    if unknown:
+        ap.error(f"benchmarks desconocidos: {unknown}")
+    names = [n for n in names if n not in args.skip.split(",")]
+
+    suite: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix="bench-suite-") as tmp:
+        for name in names:
+            command, quick = SUITE[name]
+            suite[name] = run_one(name, command + (quick if args.quick else []), Path(tmp) / f"{name}.json")
+
+    failed = [name for name, entry in suite.items() if entry["returncode"] != 0]
+    print(f"-> {write_results('suite', {'quick': args.quick, 'benchmarks': suite}, args.out)}")
+    if failed:
+        print(f"fallaron: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
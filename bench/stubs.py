@@ -0,0 +1,259 @@
+# bench/stubs.py
+"""
+Servidores HTTP locales que imitan a los upstreams (open.er-api.com y Groq) para medir
+y probar sin red. Latencia, jitter y tasa de errores son configurables.
+
+También se pueden levantar sueltos para probar `app.py` a mano:
+
+    python -m bench.stubs [--fx-latency 0.05] [--llm-latency 0.3] [--jitter 0.01] [--error-rate 0]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+# Tasas de referencia (unidades por 1 USD) para respuestas deterministas.
+USD_RATES: Dict[str, float] = {
+    "USD": 1.0,
+    "AUD": 1.5213,
+    "EUR": 0.9187,
+    "GBP": 0.7862,
+    "ARS": 978.25,
+    "BRL": 5.4521,
+    "CLP": 942.11,
+    "COP": 4187.52,
+    "MXN": 19.6413,
+    "PEN": 3.7589,
+    "JPY": 149.87,
+    "CAD": 1.3761,
+    "CHF": 0.8612,
+}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # El backlog por defecto (5) descarta conexiones bajo carga concurrente.
+    request_queue_size = 1024
+
+
+class StubServer(ABC):
+    """
+    Base de los stubs: levanta un `ThreadingHTTPServer` en un puerto libre de
+    127.0.0.1 y aplica latencia + jitter y errores 503 aleatorios a cada petición.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.down = False
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status: int, payload: Dict) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _inject(self) -> bool:
+                # Devuelve True si esta petición debe fallar.
+                with stub._lock:
+                    stub.requests += 1
+                    delay = max(0.0, stub.latency + stub._rng.uniform(-stub.jitter, stub.jitter))
+                    fail = stub.down or stub._rng.random() < stub.error_rate
+                    if fail:
+                        stub.errors += 1
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    self._send_json(503, {"result": "error", "error-type": "unavailable"})
+                return fail
+
+            def do_GET(self):
+                if not self._inject():
+                    stub.handle("GET", self)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self.body = self.rfile.read(length) if length else b""
+                if not self._inject():
+                    stub.handle("POST", self)
+
+        return Handler
+
+    @abstractmethod
+    def handle(self, method: str, handler) -> None:
+        """Responde la petición `method` ya pasada por la latencia y los errores."""
+
+    def start(self) -> "StubServer":
+        self._server = _Server(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class FxStubServer(StubServer):
+    """
+    Imita `GET /v6/latest/{BASE}` de open.er-api.com. Usar con
+    `FrankfurterProvider(base_url=stub.base_url)`.
+    """
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.url}/v6/latest"
+
+    def handle(self, method: str, handler) -> None:
+        base = handler.path.rstrip("/").rsplit("/", 1)[-1].upper()
+        if not handler.path.startswith("/v6/latest/") or base not in USD_RATES:
+            handler._send_json(404, {"result": "error", "error-type": "unsupported-code"})
+            return
+        now = int(time.time())
+        pivot = USD_RATES[base]
+        handler._send_json(200, {
+            "result": "success",
+            "base_code": base,
+            "time_last_update_unix": now - now % 86400,
+            "time_next_update_unix": now - now % 86400 + 86400,
+            "rates": {code: rate / pivot for code, rate in USD_RATES.items()},
+        })
+
+
+class GroqStubServer(StubServer):
+    """
+    Imita `POST /openai/v1/chat/completions` de Groq (formato OpenAI), con y
+    sin `stream=True`. Usar con `GROQ_BASE_URL=stub.url` y cualquier
+    `GROQ_API_KEY`. `token_delay` espacia los tokens del stream.
+    """
+
+    answer = (
+        "La tasa de cambio es el precio de una moneda en términos de otra; en un "
+        "parque eólico financiado en USD con ingresos en COP, define cuánto cuesta "
+        "pagar la deuda cada mes."
+    )
+
+    def __init__(self, *args, token_delay: float = 0.0, fail_stream_after: Optional[int] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.token_delay = token_delay
+        self.fail_stream_after = fail_stream_after
+
+    def _stream(self, handler, request: Dict, now: int) -> None:
+        # Respuesta `stream=True`: un chunk SSE por palabra y `[DONE]` al final.
+        # Con `fail_stream_after` corta la conexión a mitad del stream.
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def write(payload: str) -> None:
+            data = f"data: {payload}\n\n".encode("utf-8")
+            handler.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+            handler.wfile.flush()
+
+        words = self.answer.split(" ")
+        for i, word in enumerate(words):
+            if self.fail_stream_after is not None and i >= self.fail_stream_after:
+                handler.close_connection = True
+                return
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            write(json.dumps({
+                "id": f"chatcmpl-stub-{now}",
+                "object": "chat.completion.chunk",
+                "created": now,
+                "model": request.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": word if i == 0 else " " + word},
+                    "finish_reason": None,
+                }],
+            }))
+        write("[DONE]")
+        handler.wfile.write(b"0\r\n\r\n")
+
+    def handle(self, method: str, handler) -> None:
+        if method != "POST" or not handler.path.endswith("/chat/completions"):
+            handler._send_json(404, {"error": {"message": "not found"}})
+            return
+        request = json.loads(handler.body or b"{}")
+        now = int(time.time())
+        if request.get("stream"):
+            self._stream(handler, request, now)
+            return
+        handler._send_json(200, {
+            "id": f"chatcmpl-stub-{now}",
+            "object": "chat.completion",
+            "created": now,
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.answer},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 50, "completion_tokens": 40, "total_tokens": 90},
+        })
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Levanta los stubs de FX y Groq hasta Ctrl+C.")
+    ap.add_argument("--fx-latency", type=float, default=0.05)
+    ap.add_argument("--llm-latency", type=float, default=0.3)
+    ap.add_argument("--jitter", type=float, default=0.0, help="± segundos aleatorios sobre la latencia")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fracción de respuestas 503")
+    ap.add_argument("--token-delay", type=float, default=0.0, help="pausa entre tokens del stream del LLM")
+    args = ap.parse_args()
+
+    common = dict(jitter=args.jitter, error_rate=args.error_rate)
+    with FxStubServer(latency=args.fx_latency, **common) as fx, \
+            GroqStubServer(latency=args.llm_latency, token_delay=args.token_delay, **common) as groq:
+        print("Stubs listos. Para apuntar la app a ellos:")
+        print(f"  export FX_BASE_URL={fx.base_url}")
+        print(f"  export GROQ_BASE_URL={groq.url}")
+        print("  export GROQ_API_KEY=stub")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# src/answer_cache.py
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from .extractor import strip_accents
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """
+    Forma canónica de una pregunta para usarla como clave de caché:
+    sin mayúsculas, tildes, signos de puntuación ni espacios repetidos.
+    "¿Qué es  la TASA de cambio?" -> "que es la tasa de cambio"
+    """
+    text = strip_accents(question.casefold())
+    text = _PUNCTUATION.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+class AnswerCache:
+    """
+    Caché LRU + TTL de respuestas del LLM.
+
+    La clave combina la pregunta normalizada con el modelo, el system prompt y
+    la temperatura, así que cambiar cualquiera de ellos invalida las entradas.
+    Con `path` las respuestas también se guardan en SQLite y sobreviven a un
+    reinicio; la tabla se poda en cada escritura (vencidas y, pasado
+    `max_entries`, las que vencen antes). Si SQLite falla la entrada queda
+    solo en memoria y el error se cuenta en `db_errors`. Cada entrada recuerda
+    cuánto tardó el LLM en producirla, para reportar la latencia ahorrada por
+    los aciertos.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        system_prompt: str,
+        temperature: float,
+        max_entries: int = 256,
+        ttl: float = 24 * 3600.0,
+        path: Optional[str] = None,
+    ):
+        self.model = model
+        self.system_prompt = system_prompt
+        self.temperature = temperature
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # clave -> (respuesta, expira_en, latencia_original)
+        self._entries: "OrderedDict[str, Tuple[str, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "saved_latency_s": 0.0, "db_errors": 0}
+
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "key TEXT PRIMARY KEY, answer TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, latency REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM answers WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+
+    def key(self, question: str) -> str:
+        raw = json.dumps(
+            [normalize_question(question), self.model, self.system_prompt, self.temperature],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _load(self, key: str) -> Optional[Tuple[str, float, float]]:
+        # Llamar con self._lock tomado.
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT answer, expires_at, latency FROM answers WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            self._stats["db_errors"] += 1
+            return None
+        return tuple(row) if row else None
+
+    def _persist(self, key: str, entry: Tuple[str, float, float]) -> None:
+        # Llamar con self._lock tomado.
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO answers (key, answer, expires_at, latency) VALUES (?, ?, ?, ?)",
+                (key, *entry),
+            )
+            self._db.execute("DELETE FROM answers WHERE expires_at <= ?", (time.time(),))
+            self._db.execute(
+                "DELETE FROM answers WHERE key NOT IN "
+                "(SELECT key FROM answers ORDER BY expires_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+        except sqlite3.Error:
+            self._stats["db_errors"] += 1
+            try:
+                self._db.rollback()
+            except sqlite3.Error:
+                pass
+
+    def _remember(self, key: str, entry: Tuple[str, float, float]) -> None:
+        # Llamar con self._lock tomado.
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, question: str) -> Optional[str]:
+        key = self.key(question)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key) or self._load(key)
+            if entry is None or entry[1] <= now:
+                self._entries.pop(key, None)
+                self._stats["misses"] += 1
+                return None
+            self._remember(key, entry)
+            self._stats["hits"] += 1
+            self._stats["saved_latency_s"] += entry[2]
+            return entry[0]
+
+    def put(self, question: str, answer: str, latency: float = 0.0) -> None:
+        key = self.key(question)
+        entry = (answer, time.time() + self.ttl, latency)
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._persist(key, entry)
+
+    def get_or_compute(self, question: str, compute: Callable[[str], str]) -> str:
+        """
+        Respuesta cacheada o, si no existe, `compute(question)` medida y guardada.
+        Los errores de `compute` se propagan y no se cachean.
+        """
+        answer = self.get(question)
+        if answer is not None:
+            return answer
+        start = time.perf_counter()
+        answer = compute(question)
+        self.put(question, answer, latency=time.perf_counter() - start)
+        return answer
+
+    async def get_or_compute_async(self, question: str, compute: Callable[[str], Awaitable[str]]) -> str:
+        """
+        Como `get_or_compute`, con `compute` asíncrona. Con SQLite las lecturas
+        y escrituras corren en un hilo para no bloquear el event loop.
+        """
+        if self._db is None:
+            answer = self.get(question)
+        else:
+            answer = await asyncio.to_thread(self.get, question)
+        if answer is not None:
+            return answer
+        start = time.perf_counter()
+        answer = await compute(question)
+        latency = time.perf_counter() - start
+        if self._db is None:
+            self.put(question, answer, latency=latency)
+        else:
+            await asyncio.to_thread(self.put, question, answer, latency)
+        return answer
+
+    def warm_up(self, questions: Iterable[str], compute: Callable[[str], str]) -> int:
+        """Pre-responde `questions`; devuelve cuántas quedaron en caché."""
+        warmed = 0
+        for question in questions:
+            try:
+                self.get_or_compute(question, compute)
+                warmed += 1
+            except Exception:
+                continue
+        return warmed
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats: Dict[str, float] = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        total = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / total if total else 0.0
+        return stats
+
+
+def answer_cache_from_env() -> AnswerCache:
+    """
+    Caché configurada para el cliente de Groq actual y las variables
+    LLM_CACHE_PATH, LLM_CACHE_SIZE y LLM_CACHE_TTL.
+    """
+    from . import llm_client
+
+    return AnswerCache(
+        model=llm_client.MODEL,
+        system_prompt=llm_client.SYSTEM_PROMPT,
+        temperature=llm_client.TEMPERATURE,
+        max_entries=int(os.getenv("LLM_CACHE_SIZE", "256")),
+        ttl=float(os.getenv("LLM_CACHE_TTL", str(24 * 3600))),
+        path=os.getenv("LLM_CACHE_PATH") or None,
+    )
@@ -1,12 +1,18 @@
 # src/currency_agent.py
 from __future__ import annotations
 
+import asyncio
 import re
+import time
 from dataclasses import dataclass
-from typing import Optional, Tuple, List
+from datetime import date
+from typing import Any, Iterable, Iterator, Optional, Tuple
 
-from .fx_provider import FrankfurterProvider
-from .llm_client import ask_llm
+from . import metrics
+from .answer_cache import AnswerCache
+from .extractor import ISO_CODES, CurrencyExtractor, Extraction, resolve_date
+from .fx_provider import AsyncFrankfurterProvider, FrankfurterProvider, Quote, _utc_day
+from .llm_client import ask_llm, ask_llm_async, stream_llm
 
 SUPPORTED_CODES = [
     "USD", "AUD", "EUR", "GBP",
@@ -31,72 +37,169 @@ NAME_TO_CODE = {
     "dólares australianos": "AUD",
     "libra esterlina": "GBP",
     "libras esterlinas": "GBP",
+    "dólar estadounidense": "USD",
+    "dólares estadounidenses": "USD",
+    "dólar canadiense": "CAD",
+    "dólares canadienses": "CAD",
+    "dólar neozelandés": "NZD",
+    "dólares neozelandeses": "NZD",
+    "dólar de hong kong": "HKD",
+    "dólares de hong kong": "HKD",
+    "dólar de singapur": "SGD",
+    "dólares de singapur": "SGD",
+    "peso uruguayo": "UYU",
+    "pesos uruguayos": "UYU",
+    "peso dominicano": "DOP",
+    "pesos dominicanos": "DOP",
+    "peso cubano": "CUP",
+    "pesos cubanos": "CUP",
+    "peso filipino": "PHP",
+    "pesos filipinos": "PHP",
+    "guaraní paraguayo": "PYG",
+    "guaraníes paraguayos": "PYG",
+    "bolívar venezolano": "VES",
+    "bolívares venezolanos": "VES",
+    "quetzal guatemalteco": "GTQ",
+    "quetzales guatemaltecos": "GTQ",
+    "colón costarricense": "CRC",
+    "colones costarricenses": "CRC",
+    "lempira hondureño": "HNL",
+    "lempiras hondureños": "HNL",
+    "córdoba nicaragüense": "NIO",
+    "córdobas nicaragüenses": "NIO",
+    "balboa panameño": "PAB",
+    "balboas panameños": "PAB",
+    "yen japonés": "JPY",
+    "yenes japoneses": "JPY",
+    "yuan chino": "CNY",
+    "yuanes chinos": "CNY",
+    "franco suizo": "CHF",
+    "francos suizos": "CHF",
+    "rupia india": "INR",
+    "rupias indias": "INR",
+    "won surcoreano": "KRW",
+    "wones surcoreanos": "KRW",
+    "rand sudafricano": "ZAR",
+    "rands sudafricanos": "ZAR",
+    "lira turca": "TRY",
+    "liras turcas": "TRY",
+    "rublo ruso": "RUB",
+    "rublos rusos": "RUB",
+    "corona sueca": "SEK",
+    "coronas suecas": "SEK",
+    "corona noruega": "NOK",
+    "coronas noruegas": "NOK",
+    "corona danesa": "DKK",
+    "coronas danesas": "DKK",
+    "esloti polaco": "PLN",
+    "eslotis polacos": "PLN",
 }
 
 
+# Señales de que la pregunta pide un concepto, aunque traiga montos y monedas.
+# "porque" (causal) no cuenta: solo "por qué", "porqué" o "¿porque?". "Qué es"
+# seguido de un monto ("¿Qué es 100 USD en COP?") es una conversión.
+_CONCEPT_CUES = re.compile(
+    r"(?<![^\W\d_])(?:"
+    r"qu[eé]\s+(?:significa|implica|pasa)|qu[eé]\s+es(?![^\W\d_])(?!\s*[\d$€£¥])|"
+    r"por\s+qu[eé](?![^\W\d_])|porqu[eé]\s*\?|porqué(?![^\W\d_])|expl[ií]ca(?:me)?|"
+    r"c[oó]mo\s+(?:afecta|impacta|funciona|cubr)|riesgo|cobertura"
+    r")",
+    re.IGNORECASE,
+)
+
+
+class InvalidDateError(ValueError):
+    """La pregunta pide una fecha que no existe o que todavía no llegó."""
+
+
 class Parser:
     """
     Parser sencillo en español que:
     - Extrae monto numérico
     - Detecta monedas origen/destino
     - Decide si es pregunta de conversión (tool) o conceptual (sin tool)
-    """
-
-    def _find_amount(self, text: str) -> Optional[float]:
-        # Acepta formatos como "10,000", "1.000,50", "500"
-        m = re.search(r"(\d[\d\.\,]*)", text)
-        if not m:
-            return None
-        raw = m.group(1).replace(".", "").replace(",", ".")
-        try:
-            return float(raw)
-        except ValueError:
-            return None
+    - Reconoce fechas ("ayer", "hace 3 días", "15/10/2026") para consultas históricas
 
-    def _find_currency_codes(self, text: str) -> List[str]:
-        # Busca códigos tipo USD, COP, EUR, etc. sin distinguir mayúsculas
-        codes: List[str] = []
+    La extracción la hace un `CurrencyExtractor` compilado una sola vez y
+    compartido entre instancias (una pasada por pregunta, con límites de palabra).
+    """
 
-        text_lower = text.lower()
-        for name, code in NAME_TO_CODE.items():
-            if name in text_lower and code not in codes:
-                codes.append(code)
+    def __init__(self, extractor: Optional[CurrencyExtractor] = None):
+        self.extractor = extractor or _default_extractor()
 
-        up = text.upper()
-        for code in SUPPORTED_CODES:
-            if code in up:
-                codes.append(code)
+    def is_conceptual(self, question: str) -> bool:
+        """True si la pregunta pide una explicación (qué es, por qué, riesgo...)."""
+        return _CONCEPT_CUES.search(question) is not None
 
-        # sin duplicados, preserva orden
-        return list(dict.fromkeys(codes))
+    def parse_date(self, question: str, today: Optional[date] = None) -> Optional[date]:
+        """
+        Fecha pedida en la pregunta ("¿cuánto era ... ayer?") o None si no hay
+        fecha o es hoy (la tasa de hoy sale de la API en vivo). "Hoy" es el día
+        UTC, el mismo con el que el proveedor decide si una fecha es pasada.
+        Lanza InvalidDateError si la fecha no existe ("31/02/2026") o es futura:
+        responder con la tasa de otro día sería peor que no responder.
+        """
+        return self._date(self.extractor.extract(question), today)
 
     def parse(self, question: str) -> Optional[Tuple[float, str, str]]:
         """
         Devuelve (amount, from_code, to_code) si es consulta de conversión.
         Si no puede interpretar la pregunta como conversión, devuelve None.
         """
-        q = question.lower()
+        return self._conversion(self.extractor.extract(question))
 
-        amount = self._find_amount(q)
-        codes = self._find_currency_codes(q)
+    def parse_full(
+        self, question: str, today: Optional[date] = None
+    ) -> Tuple[Optional[Tuple[float, str, str]], Optional[date]]:
+        """
+        `(parse(question), parse_date(question))` con una sola pasada del
+        extractor. La fecha solo se valida (InvalidDateError) en conversiones.
+        """
+        found = self.extractor.extract(question)
+        parsed = self._conversion(found)
+        return parsed, self._date(found, today) if parsed else None
+
+    @staticmethod
+    def _date(found: Extraction, today: Optional[date]) -> Optional[date]:
+        if found.when is None:
+            return None
+        today = today or _utc_day(time.time())
+        day = resolve_date(found.when, today)
+        if day is None:
+            raise InvalidDateError(f"La fecha «{found.when}» no existe.")
+        if day > today:
+            raise InvalidDateError(
+                f"La fecha «{found.when}» es futura: todavía no hay tasas publicadas para ese día."
+            )
+        return day if day != today else None
+
+    @staticmethod
+    def _conversion(found: Extraction) -> Optional[Tuple[float, str, str]]:
+        amount = found.amount
+        codes = found.codes
 
         # Caso 1: hay monto explícito
         if amount is not None:
-            # Intentamos primero patrón "en|a MONEDA" para fijar el destino:
+            # La moneda escrita justo tras el monto es el origen ("500 EUR").
+            from_code = found.source
+
+            # El patrón "en|a MONEDA" fija el destino:
             # ej. "¿Cuánto es 1000 COP en AUD?"
-            dest_pattern = r"(?:en|a)\s+(usd|aud|eur|gbp|ars|brl|clp|cop|mxn|pen)"
-            m_dest = re.search(dest_pattern, q)
-            if m_dest:
-                to_code = m_dest.group(1).upper()
-                # origen = primera moneda distinta de destino
-                from_code = None
-                for c in codes:
-                    if c != to_code:
-                        from_code = c
-                        break
+            to_code = found.dest
+            if to_code:
+                # origen = moneda tras el monto o la primera distinta de destino
+                if from_code in (None, to_code):
+                    from_code = next((c for c in codes if c != to_code), None)
                 if from_code:
                     return amount, from_code, to_code
 
+            # "¿Cuántos EUR son 42 USD?": origen tras el monto, destino la otra.
+            if from_code:
+                for c in codes:
+                    if c != from_code:
+                        return amount, from_code, c
+
             # Si no hay patrón claro pero sí dos monedas, usamos la regla simple:
             if len(codes) >= 2:
                 return amount, codes[0], codes[1]
@@ -110,65 +213,305 @@ class Parser:
 
         # En cualquier otro caso, no se interpreta como conversión
         return None
+
+
+_EXTRACTOR: Optional[CurrencyExtractor] = None
+
+
+def _default_extractor() -> CurrencyExtractor:
+    # Todos los códigos ISO en mayúsculas; los soportados también en minúsculas.
+    global _EXTRACTOR
+    if _EXTRACTOR is None:
+        _EXTRACTOR = CurrencyExtractor(NAME_TO_CODE, codes=ISO_CODES, ci_codes=SUPPORTED_CODES)
+    return _EXTRACTOR
+
+
+# La etapa "llm" mide solo las llamadas reales al modelo: los aciertos de la
+# caché de respuestas no entran en el histograma.
+def _timed_ask_llm(question: str) -> str:
+    with metrics.stage("llm"):
+        return ask_llm(question)
+
+
+async def _timed_ask_llm_async(question: str) -> str:
+    with metrics.stage("llm"):
+        return await ask_llm_async(question)
+
+
+def fallback_explanation(note: str) -> str:
+    """Explicación fija de tasa de cambio para cuando no se usa el LLM."""
+    return (
+        "La tasa de cambio es el precio de una moneda expresado en otra. "
+        "Es clave en transacciones internacionales porque determina el valor "
+        "real de pagos, inversiones y deudas cuando las partes operan en "
+        "monedas diferentes; en energía y recursos ayuda a gestionar el "
+        "riesgo de que los ingresos estén en moneda local mientras la deuda "
+        "y los contratos de suministro estén en divisas fuertes como USD o EUR."
+        f"(Nota técnica: {note})"
+    )
+
+
+# (texto, used_tool, fx_info) — ver CurrencyAgent.answer
+Answer = Tuple[str, bool, Optional[Tuple[str, str, float]]]
+
+
+def _fmt(value: float) -> str:
+    # Formateo con separador de miles y coma decimal estilo ES
+    return (
+        f"{value:,.2f}"
+        .replace(",", "X")
+        .replace(".", ",")
+        .replace("X", ".")
+    )
+
+
+def _rate_note(quote: Quote) -> str:
+    # Aclara de dónde sale la tasa cuando no es la de hoy en vivo.
+    day = quote.as_of.isoformat() if quote.as_of else "fecha desconocida"
+    if quote.source == "historical":
+        return f"(tasa del {day})"
+    if quote.source == "snapshot":
+        return f"(sin datos en vivo de la API: última tasa conocida, del {day})"
+    return ""
+
+
+def _conversion_answer(
+    amount: float, from_code: str, to_code: str, converted: float, quote: Optional[Quote] = None
+) -> Answer:
+    # tasa 1 -> 1
+    rate = converted / amount if amount != 0 else 0.0
+
+    text = (
+        f"{_fmt(amount)} {from_code} equivalen aproximadamente a "
+        f"{_fmt(converted)} {to_code} "
+        #f"(tasa de cambio diaria obtenida automáticamente; "
+        #f"solo para fines educativos)."
+    )
+    if quote is not None:
+        text += _rate_note(quote)
+
+    return text, True, (from_code, to_code, rate)
+
+
+def _conversion_error(from_code: str, to_code: str, e: Exception) -> Answer:
+    msg = (
+        f"No pude obtener la tasa de cambio para {from_code}->{to_code}. "
+        f"Detalle técnico: {e}"
+    )
+    return msg, True, None
+
+
+def _date_error(e: InvalidDateError) -> Answer:
+    msg = (
+        f"{e} No hice la conversión para no usar la tasa de otro día: "
+        "revisa la fecha o pregunta sin fecha para usar la tasa de hoy."
+    )
+    return msg, False, None
+
+
+def _combine(conversion: Answer, explanation: str) -> Answer:
+    # Pregunta mixta: conversión + explicación conceptual del LLM.
+    text, used_tool, fx_info = conversion
+    return f"{text}\n\n{explanation}", used_tool, fx_info
+
+
 @dataclass
 class CurrencyAgent:
     provider: FrankfurterProvider
     parser: Parser
+    answer_cache: Optional[AnswerCache] = None
+    # False = modo solo FX: las preguntas conceptuales no llaman al LLM.
+    llm_enabled: bool = True
+
+    def warm_up(self, questions: Iterable[str]) -> int:
+        """
+        Pre-responde en la caché del LLM las preguntas conceptuales de
+        `questions` (p. ej. los presets de la demo). Devuelve cuántas quedaron.
+        """
+        if self.answer_cache is None or not self.llm_enabled:
+            return 0
+        conceptual = [q for q in questions if self.parser.parse(q) is None]
+        return self.answer_cache.warm_up(conceptual, ask_llm)
+
+    def _convert(self, amount: float, from_code: str, to_code: str, on: Optional[date] = None) -> Answer:
+        try:
+            with metrics.stage("fx"):
+                quote = self.provider.quote(from_code, to_code, on=on)
+        except Exception as e:
+            return _conversion_error(from_code, to_code, e)
+        return _conversion_answer(amount, from_code, to_code, amount * quote.rate, quote)
+
+    def _explain(self, question: str) -> str:
+        if not self.llm_enabled:
+            return fallback_explanation("modo solo FX, el modelo de lenguaje está desactivado")
+        try:
+            if self.answer_cache is not None:
+                return self.answer_cache.get_or_compute(question, _timed_ask_llm)
+            return _timed_ask_llm(question)
+        except Exception as e:
+            # Fallback en caso de error con el LLM
+            metrics.upstream_error("llm", type(e).__name__)
+            return fallback_explanation(f"no pude acceder al modelo de lenguaje para responder; {e}")
 
-    def answer(self, question: str) -> Tuple[str, bool, Optional[Tuple[str, str, float]]]:
+    def answer(self, question: str) -> Answer:
         """
         Devuelve:
         - texto de respuesta
         - used_tool: True si llamó a la tool de FX
         - fx_info: (from_code, to_code, rate_1_to_1) o None
+
+        Cada etapa (parse, fx, llm) se mide con `metrics.stage` y el total
+        queda en `fx_answer_seconds{route="tool"|"llm"|"mixed"}`.
         """
-        parsed = self.parser.parse(question)
+        start = time.perf_counter()
+        try:
+            with metrics.stage("parse"):
+                parsed, on = self.parser.parse_full(question)
+        except InvalidDateError as e:
+            metrics.observe_answer("tool", time.perf_counter() - start)
+            return _date_error(e)
 
         # Si el parser entiende que es una conversión, llamamos a la "tool"
+        # (con fecha, la tasa sale del almacén local de tasas históricas).
         if parsed:
-            amount, from_code, to_code = parsed
-            try:
-                converted = self.provider.convert(amount, from_code, to_code)
-            except Exception as e:
-                msg = (
-                    f"No pude obtener la tasa de cambio para {from_code}->{to_code}. "
-                    f"Detalle técnico: {e}"
-                )
-                return msg, True, None
-
-            # Formateo con separador de miles y coma decimal estilo ES
-            def fmt(value: float) -> str:
-                return (
-                    f"{value:,.2f}"
-                    .replace(",", "X")
-                    .replace(".", ",")
-                    .replace("X", ".")
-                )
+            conversion = self._convert(*parsed, on=on)
+            # Si además pide un concepto ("¿qué significa que 100 USD sean...?"),
+            # agregamos la explicación del LLM.
+            if self.llm_enabled and self.parser.is_conceptual(question):
+                result = _combine(conversion, self._explain(question))
+                metrics.observe_answer("mixed", time.perf_counter() - start)
+                return result
+            metrics.observe_answer("tool", time.perf_counter() - start)
+            return conversion
 
-            # tasa 1 -> 1
-            rate = converted / amount if amount != 0 else 0.0
+        # Si no es conversión (Pregunta 3), delegamos la respuesta al LLM de Gorq
+        result = self._explain(question), False, None
+        metrics.observe_answer("llm", time.perf_counter() - start)
+        return result
 
-            text = (
-                f"{fmt(amount)} {from_code} equivalen aproximadamente a "
-                f"{fmt(converted)} {to_code} "
-                #f"(tasa de cambio diaria obtenida automáticamente; "
-                #f"solo para fines educativos)."
-            )
+    def answer_stream(self, question: str) -> Iterator[Tuple[str, Any]]:
+        """
+        Igual que `answer`, pero entrega la respuesta como eventos a medida que
+        el LLM genera tokens:
+        - ("meta", {"used_tool", "fx_info"}) al inicio,
+        - ("token", texto) por cada fragmento,
+        - ("fallback", texto_completo) si el stream falla a mitad de camino:
+          reemplaza todo lo enviado por la explicación fija,
+        - ("done", None) al final.
+
+        El total, hasta el último evento, también queda en `fx_answer_seconds`.
+        """
+        start = time.perf_counter()
+        try:
+            with metrics.stage("parse"):
+                parsed, on = self.parser.parse_full(question)
+        except InvalidDateError as e:
+            text, used_tool, fx_info = _date_error(e)
+            yield "meta", {"used_tool": used_tool, "fx_info": fx_info}
+            yield "token", text
+            metrics.observe_answer("tool", time.perf_counter() - start)
+            yield "done", None
+            return
+        wants_llm = not parsed or (self.llm_enabled and self.parser.is_conceptual(question))
+        route = "mixed" if parsed else "llm"
 
-            return text, True, (from_code, to_code, rate)
+        prefix = ""
+        if parsed:
+            text, used_tool, fx_info = self._convert(*parsed, on=on)
+            yield "meta", {"used_tool": used_tool, "fx_info": fx_info}
+            if not wants_llm:
+                yield "token", text
+                metrics.observe_answer("tool", time.perf_counter() - start)
+                yield "done", None
+                return
+            prefix = f"{text}\n\n"
+            yield "token", prefix
+        else:
+            yield "meta", {"used_tool": False, "fx_info": None}
 
-        # Si no es conversión (Pregunta 3), delegamos la respuesta al LLM de Gorq
+        cached = self.answer_cache.get(question) if self.answer_cache is not None else None
+        if cached is not None or not self.llm_enabled:
+            yield "token", cached if cached is not None else self._explain(question)
+            metrics.observe_answer(route, time.perf_counter() - start)
+            yield "done", None
+            return
+
+        parts = []
+        llm_start = time.perf_counter()
         try:
-            msg = ask_llm(question)
+            for token in stream_llm(question):
+                parts.append(token)
+                yield "token", token
         except Exception as e:
-            # Fallback en caso de error con el LLM
-            msg = (
-                "La tasa de cambio es el precio de una moneda expresado en otra. "
-                "Es clave en transacciones internacionales porque determina el valor "
-                "real de pagos, inversiones y deudas cuando las partes operan en "
-                "monedas diferentes; en energía y recursos ayuda a gestionar el "
-                "riesgo de que los ingresos estén en moneda local mientras la deuda "
-                "y los contratos de suministro estén en divisas fuertes como USD o EUR."
-                f"(Nota técnica: no pude acceder al modelo de lenguaje para responder; {e})"
-            )
-        return msg, False, None
+            metrics.upstream_error("llm", type(e).__name__)
+            note = f"no pude acceder al modelo de lenguaje para responder; {e}"
+            yield "fallback", prefix + fallback_explanation(note)
+            metrics.observe_answer(route, time.perf_counter() - start)
+            yield "done", None
+            return
+
+        llm_seconds = time.perf_counter() - llm_start
+        if metrics.enabled():
+            metrics.record("llm", llm_seconds)
+        answer = "".join(parts).strip()
+        if self.answer_cache is not None and answer:
+            self.answer_cache.put(question, answer, latency=llm_seconds)
+        metrics.observe_answer(route, time.perf_counter() - start)
+        yield "done", None
+
+
+@dataclass
+class AsyncCurrencyAgent:
+    """
+    Variante asíncrona de `CurrencyAgent` para servir muchas preguntas desde un
+    solo event loop. En preguntas mixtas la tool de FX y el LLM corren a la vez.
+    """
+
+    provider: AsyncFrankfurterProvider
+    parser: Parser
+    answer_cache: Optional[AnswerCache] = None
+    llm_enabled: bool = True
+
+    async def _convert(self, amount: float, from_code: str, to_code: str, on: Optional[date] = None) -> Answer:
+        try:
+            with metrics.stage("fx"):
+                quote = await self.provider.quote(from_code, to_code, on=on)
+        except Exception as e:
+            return _conversion_error(from_code, to_code, e)
+        return _conversion_answer(amount, from_code, to_code, amount * quote.rate, quote)
+
+    async def _explain(self, question: str) -> str:
+        if not self.llm_enabled:
+            return fallback_explanation("modo solo FX, el modelo de lenguaje está desactivado")
+        try:
+            if self.answer_cache is not None:
+                return await self.answer_cache.get_or_compute_async(question, _timed_ask_llm_async)
+            return await _timed_ask_llm_async(question)
+        except Exception as e:
+            metrics.upstream_error("llm", type(e).__name__)
+            return fallback_explanation(f"no pude acceder al modelo de lenguaje para responder; {e}")
+
+    async def answer(self, question: str) -> Answer:
+        """Igual que `CurrencyAgent.answer`, sin bloquear el event loop."""
+        start = time.perf_counter()
+        try:
+            with metrics.stage("parse"):
+                parsed, on = self.parser.parse_full(question)
+        except InvalidDateError as e:
+            metrics.observe_answer("tool", time.perf_counter() - start)
+            return _date_error(e)
+
+        if parsed:
+            if self.llm_enabled and self.parser.is_conceptual(question):
+                conversion, explanation = await asyncio.gather(
+                    self._convert(*parsed, on=on), self._explain(question)
+                )
+                metrics.observe_answer("mixed", time.perf_counter() - start)
+                return _combine(conversion, explanation)
+            result = await self._convert(*parsed, on=on)
+            metrics.observe_answer("tool", time.perf_counter() - start)
+            return result
+
+        result = await self._explain(question), False, None
+        metrics.observe_answer("llm", time.perf_counter() - start)
+        return result
@@ -0,0 +1,241 @@
+# src/extractor.py
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+# Códigos ISO 4217 que publica open.er-api.com.
+ISO_CODES = (
+    "AED", "AFN", "ALL", "AMD", "ANG", "AOA", "ARS", "AUD", "AWG", "AZN",
+    "BAM", "BBD", "BDT", "BGN", "BHD", "BIF", "BMD", "BND", "BOB", "BRL",
+    "BSD", "BTN", "BWP", "BYN", "BZD", "CAD", "CDF", "CHF", "CLP", "CNY",
+    "COP", "CRC", "CUP", "CVE", "CZK", "DJF", "DKK", "DOP", "DZD", "EGP",
+    "ERN", "ETB", "EUR", "FJD", "FKP", "FOK", "GBP", "GEL", "GGP", "GHS",
+    "GIP", "GMD", "GNF", "GTQ", "GYD", "HKD", "HNL", "HRK", "HTG", "HUF",
+    "IDR", "ILS", "IMP", "INR", "IQD", "IRR", "ISK", "JEP", "JMD", "JOD",
+    "JPY", "KES", "KGS", "KHR", "KID", "KMF", "KRW", "KWD", "KYD", "KZT",
+    "LAK", "LBP", "LKR", "LRD", "LSL", "LYD", "MAD", "MDL", "MGA", "MKD",
+    "MMK", "MNT", "MOP", "MRU", "MUR", "MVR", "MWK", "MXN", "MYR", "MZN",
+    "NAD", "NGN", "NIO", "NOK", "NPR", "NZD", "OMR", "PAB", "PEN", "PGK",
+    "PHP", "PKR", "PLN", "PYG", "QAR", "RON", "RSD", "RUB", "RWF", "SAR",
+    "SBD", "SCR", "SDG", "SEK", "SGD", "SHP", "SLE", "SLL", "SOS", "SRD",
+    "SSP", "STN", "SYP", "SZL", "THB", "TJS", "TMT", "TND", "TOP", "TRY",
+    "TTD", "TVD", "TWD", "TZS", "UAH", "UGX", "USD", "UYU", "UZS", "VES",
+    "VND", "VUV", "WST", "XAF", "XCD", "XDR", "XOF", "XPF", "YER", "ZAR",
+    "ZMW", "ZWL",
+)
+
+# Límites de palabra que también cortan entre dígitos y letras ("10COP"),
+# pero no dentro de palabras ("PENDIENTE" no contiene PEN).
+_NOT_AFTER_LETTER = r"(?<![^\W\d_])"
+_NOT_BEFORE_LETTER = r"(?![^\W\d_])"
+
+
+_MONTHS = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6,
+    "julio": 7, "agosto": 8, "septiembre": 9, "setiembre": 9, "octubre": 10,
+    "noviembre": 11, "diciembre": 12,
+}
+
+# Fechas absolutas ("2026-10-15", "15/10/2026", "15 de octubre [de 2026]") y
+# relativas ("ayer", "hace 3 días", "el mes pasado"). Va antes que el monto en
+# la regex para que "2026-10-15" no se lea como 2026.
+_DATE = (
+    r"\d{4}-\d{1,2}-\d{1,2}"
+    r"|\d{1,2}/\d{1,2}/\d{4}"
+    rf"|\d{{1,2}}\s+de\s+(?:{'|'.join(_MONTHS)})(?:\s+(?:de|del)\s+\d{{4}})?"
+    r"|anteayer|antier|ayer|hoy"
+    r"|hace\s+\d+\s+d[ií]as?"
+    r"|(?:el|la)\s+(?:semana|mes|año|ano)\s+pasad[oa]"
+)
+
+
+def strip_accents(text: str) -> str:
+    return "".join(
+        ch for ch in unicodedata.normalize("NFD", text) if unicodedata.category(ch) != "Mn"
+    )
+
+
+def parse_amount(raw: str) -> Optional[float]:
+    """
+    Interpreta montos en formato ES o EN: "1.000,50", "10,000", "2.5", "500".
+    Si hay ambos separadores, el último es el decimal; si hay uno solo, es de
+    miles cuando se repite o va seguido de exactamente tres dígitos.
+    """
+    raw = raw.rstrip(".,")
+    if not raw:
+        return None
+    last_dot, last_comma = raw.rfind("."), raw.rfind(",")
+    if last_dot >= 0 and last_comma >= 0:
+        decimal = "." if last_dot > last_comma else ","
+    elif last_dot >= 0 or last_comma >= 0:
+        sep = "." if last_dot >= 0 else ","
+        groups = raw.split(sep)
+        decimal = None if len(groups) > 2 or len(groups[-1]) == 3 else sep
+    else:
+        decimal = None
+
+    thousands = {".", ","} - {decimal}
+    digits = "".join(ch for ch in raw if ch not in thousands)
+    if decimal == ",":
+        digits = digits.replace(",", ".")
+    try:
+        return float(digits)
+    except ValueError:
+        return None
+
+
+def _shift_months(day: date, months: int) -> date:
+    # Mismo día `months` meses antes/después, acotado al largo del mes.
+    index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(index, 12)
+    for d in (day.day, 30, 29, 28):
+        try:
+            return date(year, month + 1, d)
+        except ValueError:
+            continue
+    raise ValueError(day)
+
+
+def resolve_date(text: str, today: Optional[date] = None) -> Optional[date]:
+    """
+    Convierte una expresión de fecha reconocida por `CurrencyExtractor` en un
+    `date` relativo a `today` (por defecto hoy). Devuelve None si la fecha no
+    existe ("31/02/2026").
+    """
+    today = today or date.today()
+    text = re.sub(r"\s+", " ", strip_accents(text.lower()).strip())
+    try:
+        if m := re.fullmatch(r"(\d{4})-(\d{1,2})-(\d{1,2})", text):
+            return date(int(m[1]), int(m[2]), int(m[3]))
+        if m := re.fullmatch(r"(\d{1,2})/(\d{1,2})/(\d{4})", text):
+            return date(int(m[3]), int(m[2]), int(m[1]))
+        if m := re.fullmatch(r"(\d{1,2}) de (\w+)(?: del? (\d{4}))?", text):
+            day = date(int(m[3] or today.year), _MONTHS[m[2]], int(m[1]))
+            # "15 de diciembre" dicho en octubre se refiere al año pasado.
+            if m[3] is None and day > today:
+                day = date(day.year - 1, day.month, day.day)
+            return day
+    except ValueError:
+        return None
+    if m := re.fullmatch(r"hace (\d+) dias?", text):
+        return today - timedelta(days=int(m[1]))
+    relative = {
+        "hoy": today,
+        "ayer": today - timedelta(days=1),
+        "anteayer": today - timedelta(days=2),
+        "antier": today - timedelta(days=2),
+        "la semana pasada": today - timedelta(days=7),
+        "el mes pasado": _shift_months(today, -1),
+        "el ano pasado": _shift_months(today, -12),
+    }
+    return relative.get(text)
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Alternación regex factorizada por prefijos comunes ("peso (?:argentino|...)")
+    para que el motor no pruebe cada palabra del vocabulario en cada posición.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        optional = "" in node
+        branches = [
+            (r"\s+" if ch == " " else re.escape(ch)) + build(child)
+            for ch, child in sorted(node.items())
+            if ch
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if optional:
+            body = ("(?:" + body + ")?") if len(branches) == 1 else body + "?"
+        return body
+
+    return build(trie)
+
+
+@dataclass
+class Extraction:
+    """Resultado de una pasada sobre la pregunta."""
+
+    amount: Optional[float] = None
+    codes: List[str] = field(default_factory=list)  # orden de aparición, sin duplicados
+    dest: Optional[str] = None  # moneda precedida de "en" / "a"
+    source: Optional[str] = None  # moneda escrita justo después del monto
+    when: Optional[str] = None  # primera expresión de fecha, tal como se escribió (ver resolve_date)
+
+
+class CurrencyExtractor:
+    """
+    Extrae monto, monedas, destino y fecha en una sola pasada con una regex compilada
+    una vez al construir el objeto. El vocabulario (nombres en español y
+    códigos ISO) se compila como trie, así que el costo crece con el largo del
+    texto y no con el tamaño del vocabulario.
+
+    - `names`: nombre en español -> código (sin distinguir mayúsculas ni tildes).
+    - `codes`: códigos ISO aceptados solo en MAYÚSCULAS (evita "sos", "top"...).
+    - `ci_codes`: códigos aceptados también en minúsculas ("cop", "usd").
+    """
+
+    def __init__(self, names: Dict[str, str], codes: Iterable[str] = ISO_CODES, ci_codes: Iterable[str] = ()):
+        self._names: Dict[str, str] = {}
+        for name, code in names.items():
+            for variant in (name.lower(), strip_accents(name.lower())):
+                self._names[variant] = code.upper()
+
+        ci = {code.upper() for code in ci_codes}
+        cs = {code.upper() for code in codes} - ci
+
+        alternatives = [f"(?P<name>{_trie_pattern(self._names)})"]
+        if ci:
+            alternatives.append(f"(?P<code>{_trie_pattern(sorted(c.lower() for c in ci))})")
+        if cs:
+            alternatives.append(f"(?-i:(?P<ucode>{_trie_pattern(sorted(cs))}))")
+
+        currency = (
+            rf"(?:{_NOT_AFTER_LETTER}(?P<cue>en|a)\s+)?"
+            rf"{_NOT_AFTER_LETTER}(?:{'|'.join(alternatives)}){_NOT_BEFORE_LETTER}"
+        )
+        date_ = rf"{_NOT_AFTER_LETTER}(?P<date>{_DATE}){_NOT_BEFORE_LETTER}"
+        self.pattern = re.compile(rf"{date_}|(?P<amount>\d[\d.,]*)|{currency}", re.IGNORECASE)
+
+    def _code_for(self, m: "re.Match[str]") -> str:
+        name = m.group("name")
+        if name is not None:
+            key = re.sub(r"\s+", " ", name.lower())
+            return self._names.get(key) or self._names[strip_accents(key)]
+        return (m.group("code") or m.group("ucode")).upper()
+
+    def extract(self, text: str) -> Extraction:
+        result = Extraction()
+        amount_end = -1
+        for m in self.pattern.finditer(text):
+            if m.group("date") is not None:
+                if result.when is None:
+                    result.when = m.group("date")
+                continue
+            if m.group("amount") is not None:
+                if result.amount is None:
+                    result.amount = parse_amount(m.group("amount"))
+                    amount_end = m.end()
+                continue
+
+            code = self._code_for(m)
+            if code not in result.codes:
+                result.codes.append(code)
+            if m.group("cue") is not None:
+                if result.dest is None:
+                    result.dest = code
+            elif result.source is None and amount_end >= 0 and not text[amount_end:m.start()].strip():
+                result.source = code
+        return result
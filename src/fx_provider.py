@@ -1,35 +1,555 @@
 from __future__ import annotations
 
-import requests
-from typing import Dict, List
+import asyncio
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple, Union
 
-BASE_URL = "https://open.er-api.com/v6/latest"
+from .http_transport import AsyncHttpTransport, AsyncSingleFlight, HttpTransport, SingleFlight
+from .rate_store import RateStore
 
+BASE_URL = os.getenv("FX_BASE_URL", "https://open.er-api.com/v6/latest")
 
-class FrankfurterProvider:
+# El upstream publica tasas una vez al día: una hora de TTL es conservador.
+DEFAULT_TTL = 3600.0
+# Evita refrescos en bucle si la API anuncia una próxima actualización ya vencida.
+MIN_TTL = 60.0
+# Moneda pivote: una sola tabla en USD permite derivar cualquier par cruzado.
+PIVOT_CODE = "USD"
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+@dataclass
+class RateTable:
     """
-    Cliente sencillo para open.er-api.com (tipos de cambio diarios, sin API key).
+    Tabla completa de tasas para una moneda base, tal como la publica la API.
+    rates[c] = unidades de c por 1 unidad de base_code.
     """
 
-    def latest(self, base: str, symbols: List[str]) -> Dict:
-        url = f"{BASE_URL}/{base.upper()}"
-        r = requests.get(url, timeout=20)
-        r.raise_for_status()
-        data = r.json()
+    base_code: str
+    rates: Dict[str, float]
+    fetched_at: float
+    expires_at: float
+    as_of: Optional[date] = None  # día de publicación (UTC)
+    # "live": descargada de la API; "snapshot": última tabla conocida, servida
+    # desde el almacén local o tras fallar su refresco.
+    source: str = "live"
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+    def cross(self, from_code: str, to_code: str) -> Optional[float]:
+        """
+        Tasa from_code -> to_code derivada de esta tabla, o None si falta alguna.
+        Como rates[base_code] == 1.0, el par directo sale exacto (r / 1.0).
+        """
+        if from_code not in self.rates or to_code not in self.rates:
+            return None
+        return self.rates[to_code] / self.rates[from_code]
+
+
+@dataclass
+class Quote:
+    """Tasa 1 from -> to junto con su fecha y de dónde salió."""
+
+    rate: float
+    as_of: Optional[date]
+    source: str  # "live" | "snapshot" | "historical"
+
+
+def _utc_day(timestamp: float) -> date:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).date()
+
+
+class _RateTableCache(ABC):
+    """
+    Caché de tablas compartida por los proveedores síncrono y asíncrono: guarda
+    una tabla completa por base con TTL (acotado por `time_next_update_unix`),
+    elige qué tabla responde cada par y lleva los contadores. Las subclases
+    ponen la descarga y la forma de refrescar en segundo plano.
+    """
+
+    def __init__(self, ttl: float, pivot: str, base_url: str, store: Optional[RateStore] = None):
+        self.ttl = ttl
+        self.pivot = pivot.upper()
+        self.base_url = base_url.rstrip("/")
+        self.store = store
+        self._tables: Dict[str, RateTable] = {}
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "fetches": 0,
+            "refresh_errors": 0,
+            "offline_hits": 0,
+            "store_errors": 0,
+        }
+        if store is not None:
+            self._warm_start()
+
+    # ------------------------------------------------------------------
+    # Almacén local de tasas
+    # ------------------------------------------------------------------
+    def _snapshot_table(self, day: date, rates_usd: Dict[str, float], expires_at: float) -> RateTable:
+        rates = dict(rates_usd)
+        rates[self.pivot] = 1.0
+        return RateTable(
+            base_code=self.pivot,
+            rates=rates,
+            fetched_at=time.time(),
+            expires_at=expires_at,
+            as_of=day,
+            source="snapshot",
+        )
+
+    def _warm_start(self) -> None:
+        # Si la última tabla guardada es la de hoy (la API publica una vez al
+        # día, en UTC), el proceso arranca con ella y no descarga nada hasta
+        # mañana. Una tabla más vieja no se precarga: solo sirve de respaldo
+        # si la API no responde (ver _offline_table).
+        snapshot = self.store.latest()
+        if snapshot is None:
+            return
+        day, rates = snapshot
+        next_day = datetime.combine(day + timedelta(days=1), dt_time(), tzinfo=timezone.utc).timestamp()
+        now = time.time()
+        if next_day <= now:
+            return
+        table = self._snapshot_table(day, rates, min(next_day, now + self.ttl))
+        table.source = "live"
+        self._tables[self.pivot] = table
+
+    def _offline_table(self) -> Optional[RateTable]:
+        # El upstream no responde: última tabla guardada, marcada como snapshot.
+        snapshot = self.store.latest() if self.store is not None else None
+        if snapshot is None:
+            return None
+        table = self._snapshot_table(*snapshot, expires_at=0.0)
+        with self._lock:
+            self._tables.setdefault(self.pivot, table)
+            self._stats["offline_hits"] += 1
+        return table
+
+    def _historical_quote(self, from_code: str, to_code: str, on: date) -> Quote:
+        # Consulta fechada: sale del almacén local, sin llamar a la red.
+        if self.store is None:
+            raise ValueError("No hay almacén local de tasas para consultas fechadas.")
+        found = self.store.nearest(on)
+        if found is None:
+            raise ValueError(f"No tengo tasas guardadas para el {on.isoformat()}.")
+        day, rates = found
+        rates = dict(rates)
+        rates[self.pivot] = 1.0
+        if from_code not in rates or to_code not in rates:
+            raise ValueError(f"No encontré tasas para {[to_code]} con base {from_code} el {day.isoformat()}")
+        return Quote(rate=rates[to_code] / rates[from_code], as_of=day, source="historical")
 
+    @abstractmethod
+    def _refresh_in_background(self, base: str) -> None:
+        """Lanza el refresco de la tabla `base` sin bloquear al que la pidió."""
+
+    def _store(self, data: Dict) -> RateTable:
+        # Valida la respuesta de la API y la guarda como tabla de su base
+        # (en memoria y en el almacén local).
+        table = self._remember(data)
+        self._persist(table)
+        return table
+
+    def _remember(self, data: Dict) -> RateTable:
+        # Valida la respuesta de la API y la deja en caché, sin tocar el disco.
         if data.get("result") != "success":
             raise ValueError(f"Respuesta inesperada de la API: {data}")
 
+        base_code = data["base_code"].upper()
+        rates = {code.upper(): float(value) for code, value in data.get("rates", {}).items()}
+        rates[base_code] = 1.0
+
+        now = time.time()
+        expires_at = now + self.ttl
+        next_update = data.get("time_next_update_unix")
+        if next_update:
+            expires_at = min(expires_at, float(next_update))
+        expires_at = max(expires_at, now + MIN_TTL)
+
+        published = data.get("time_last_update_unix")
+        as_of = _utc_day(float(published) if published else now)
+
+        table = RateTable(
+            base_code=base_code, rates=rates, fetched_at=now, expires_at=expires_at, as_of=as_of
+        )
+        with self._lock:
+            self._tables[base_code] = table
+            self._stats["fetches"] += 1
+        return table
+
+    def _persist(self, table: RateTable) -> None:
+        # Puede esperar el flock de otro proceso: la ruta async lo corre en un hilo.
+        if self.store is None:
+            return
+        try:
+            self.store.put(table.as_of, table.base_code, table.rates)
+        except OSError:
+            with self._lock:
+                self._stats["store_errors"] += 1
+
+    def _claim_refresh(self, base: str) -> bool:
+        # Llamar con self._lock tomado. True si nadie está refrescando `base`.
+        if base in self._refreshing:
+            return False
+        self._refreshing.add(base)
+        return True
+
+    def _refresh_finished(self, base: str, ok: bool) -> None:
+        # Si falló, seguimos sirviendo la tabla vencida; el próximo acceso reintenta.
+        with self._lock:
+            self._refreshing.discard(base)
+            if not ok:
+                self._stats["refresh_errors"] += 1
+                table = self._tables.get(base)
+                if table is not None:
+                    table.source = "snapshot"
+
+    def _serve(self, table: RateTable, now: float) -> RateTable:
+        # Llamar con self._lock tomado: contabiliza el acierto y, si la tabla
+        # está vencida, lanza su refresco sin bloquear al llamador.
+        if table.is_fresh(now):
+            self._stats["hits"] += 1
+        else:
+            self._stats["stale_hits"] += 1
+            self._refresh_in_background(table.base_code)
+        return table
+
+    def _find_table(self, from_code: str, to_code: str) -> Optional[RateTable]:
+        # Llamar con self._lock tomado. Prioriza la tabla de origen, luego la de
+        # destino, luego la pivote y por último cualquier otra; siempre una
+        # tabla vigente antes que una vencida.
+        order = [from_code, to_code, self.pivot]
+        order += [code for code in self._tables if code not in order]
+        candidates = [
+            self._tables[code]
+            for code in order
+            if code in self._tables and self._tables[code].cross(from_code, to_code) is not None
+        ]
+        if not candidates:
+            return None
+        now = time.time()
+        for table in candidates:
+            if table.is_fresh(now):
+                return table
+        return candidates[0]
+
+    def _cached_table(self, base: str) -> Optional[RateTable]:
+        # Tabla de `base` en caché (vigente o vencida) o None si hay que descargarla.
+        with self._lock:
+            table = self._tables.get(base)
+            if table is not None:
+                return self._serve(table, time.time())
+            self._stats["misses"] += 1
+            return None
+
+    def _cached_pair(self, from_code: str, to_code: str) -> Optional[RateTable]:
+        # Tabla en caché que cubre el par o None si hay que descargar la pivote.
+        with self._lock:
+            table = self._find_table(from_code, to_code)
+            if table is not None:
+                return self._serve(table, time.time())
+            self._stats["misses"] += 1
+            return None
+
+    @staticmethod
+    def _filter(table: RateTable, base: str, symbols: List[str]) -> Dict:
         # Filtramos solo las monedas que nos interesan
-        rates = data.get("rates", {})
+        rates = table.rates
         filtered = {code.upper(): rates[code.upper()] for code in symbols if code.upper() in rates}
 
         if not filtered:
             raise ValueError(f"No encontré tasas para {symbols} con base {base}")
 
-        return {"base_code": data["base_code"], "rates": filtered}
+        return {"base_code": table.base_code, "rates": filtered}
+
+    @staticmethod
+    def _quote(table: RateTable, from_code: str, to_code: str) -> Quote:
+        rate = table.cross(from_code, to_code)
+        if rate is None:
+            raise ValueError(f"No encontré tasas para {[to_code]} con base {from_code}")
+        return Quote(rate=rate, as_of=table.as_of, source=table.source)
+
+    @staticmethod
+    def _is_past(on: Optional[date]) -> bool:
+        return on is not None and on < _utc_day(time.time())
+
+    def cache_stats(self) -> Dict[str, float]:
+        """Contadores de la caché de tablas (aciertos, fallos, descargas...)."""
+        with self._lock:
+            stats: Dict[str, float] = dict(self._stats)
+            stats["tables"] = len(self._tables)
+        served = stats["hits"] + stats["stale_hits"]
+        total = served + stats["misses"]
+        stats["hit_ratio"] = served / total if total else 0.0
+        return stats
+
+
+class FrankfurterProvider(_RateTableCache):
+    """
+    Cliente sencillo para open.er-api.com (tipos de cambio diarios, sin API key).
+
+    Mantiene en memoria una tabla completa por moneda base con TTL (acotado por
+    `time_next_update_unix` de la API). Las tablas vencidas se siguen sirviendo
+    mientras un hilo en segundo plano las refresca, y los pares que no tienen
+    tabla propia se derivan como tasas cruzadas de cualquier tabla en caché.
+
+    Las descargas pasan por un `HttpTransport` (pool keep-alive, reintentos,
+    circuit breaker) y se coalescen por base: N hilos que fallan a la vez en la
+    misma base comparten una única petición en vuelo.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        pivot: str = PIVOT_CODE,
+        transport: Optional[HttpTransport] = None,
+        base_url: str = BASE_URL,
+        store: Optional[RateStore] = None,
+    ):
+        super().__init__(ttl=ttl, pivot=pivot, base_url=base_url, store=store)
+        self.transport = transport or HttpTransport()
+        self._flights = SingleFlight()
+        self._matrix: Optional[Tuple[RateTable, Tuple[str, ...], np.ndarray]] = None
+
+    def _fetch_table(self, base: str) -> RateTable:
+        base = base.upper()
+        return self._flights.do(
+            base, lambda: self._store(self.transport.get_json(f"{self.base_url}/{base}"))
+        )
+
+    def _refresh(self, base: str) -> None:
+        ok = False
+        try:
+            self._fetch_table(base)
+            ok = True
+        except Exception:
+            pass
+        finally:
+            self._refresh_finished(base, ok)
+
+    def _refresh_in_background(self, base: str) -> None:
+        # Llamar con self._lock tomado.
+        if self._claim_refresh(base):
+            threading.Thread(target=self._refresh, args=(base,), daemon=True).start()
+
+    def table(self, base: str) -> RateTable:
+        """
+        Tabla completa para `base`, desde caché si existe (aunque esté vencida,
+        en cuyo caso se refresca en segundo plano).
+        """
+        base = base.upper()
+        return self._cached_table(base) or self._fetch_table(base)
+
+    def latest(self, base: str, symbols: List[str]) -> Dict:
+        return self._filter(self.table(base), base, symbols)
+
+    def quote(self, from_currency: str, to_currency: str, on: Optional[date] = None) -> Quote:
+        """
+        Tasa 1 from_currency -> to_currency con su fecha y origen. Si ninguna
+        tabla en caché cubre el par se descarga la tabla pivote (USD), que
+        sirve para todos los demás; si la API no responde, se usa la última
+        tabla guardada (source="snapshot"). Con `on` en el pasado la tasa sale
+        del almacén local, sin red (source="historical").
+        """
+        from_code = from_currency.upper()
+        to_code = to_currency.upper()
+        if self._is_past(on):
+            return self._historical_quote(from_code, to_code, on)
+
+        table = self._cached_pair(from_code, to_code)
+        if table is None:
+            try:
+                table = self._fetch_table(self.pivot)
+                if table.cross(from_code, to_code) is None:
+                    # Moneda fuera de la tabla pivote: probamos con su propia base.
+                    table = self._fetch_table(from_code)
+            except Exception:
+                table = self._offline_table()
+                if table is None:
+                    raise
+        return self._quote(table, from_code, to_code)
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        return self.quote(from_currency, to_currency).rate
 
     def convert(self, amount: float, from_currency: str, to_currency: str) -> float:
-        data = self.latest(base=from_currency, symbols=[to_currency])
-        rate = data["rates"][to_currency.upper()]
-        return amount * rate
+        return amount * self.rate(from_currency, to_currency)
+
+    def pivot_table(self) -> RateTable:
+        """
+        Tabla pivote (USD) como la usa `quote`: desde caché o la red y, si la
+        API no responde, la última guardada (source="snapshot").
+        """
+        try:
+            return self.table(self.pivot)
+        except Exception:
+            table = self._offline_table()
+            if table is None:
+                raise
+            return table
+
+    def rate_matrix(
+        self, codes: Optional[Sequence[str]] = None, table: Optional[RateTable] = None
+    ) -> Tuple[List[str], np.ndarray]:
+        """
+        Matriz densa N×N de tasas construida desde la tabla pivote:
+        M[i, j] = tasa 1 codes[i] -> codes[j] = r[j] / r[i].
+        Sin `codes` usa todas las monedas cargadas en la tabla pivote. La matriz
+        se reutiliza mientras la tabla pivote no cambie. `table` fija la tabla
+        (de `pivot_table()`) para quien necesite su `as_of`/`source`.
+        """
+        import numpy as np  # solo las conversiones en lote pagan la importación
+
+        if table is None:
+            table = self.pivot_table()
+        codes = sorted(table.rates) if codes is None else [code.upper() for code in codes]
+        key = tuple(codes)
+
+        cached = self._matrix
+        if cached is not None and cached[0] is table and cached[1] == key:
+            return codes, cached[2]
+
+        missing = [code for code in codes if code not in table.rates]
+        if missing:
+            raise ValueError(f"No encontré tasas para {missing} con base {table.base_code}")
+
+        r = np.array([table.rates[code] for code in codes], dtype=np.float64)
+        matrix = r[np.newaxis, :] / r[:, np.newaxis]
+        self._matrix = (table, key, matrix)
+        return codes, matrix
+
+    def convert_many(
+        self,
+        amounts: Sequence[float],
+        from_codes: Union[str, Sequence[str]],
+        to_codes: Union[str, Sequence[str]],
+    ) -> np.ndarray:
+        """
+        Conversión vectorizada: un gather sobre `rate_matrix()` y un producto
+        por elemento. `from_codes`/`to_codes` pueden ser un código único (se
+        aplica a todos los montos) o una secuencia del mismo largo que `amounts`.
+
+        Cada elemento se calcula como amount * (r[to] / r[from]) en float64, la
+        misma operación que `convert` sobre la tabla pivote, así que los
+        resultados coinciden bit a bit. Solo difieren si `convert` usó la tabla
+        de otra base ya cacheada (vía `latest`), y entonces la diferencia es el
+        redondeo con que la API publica cada tabla (~1e-6 relativo).
+        """
+        import numpy as np
+
+        codes, matrix = self.rate_matrix()
+        amounts_arr = np.asarray(amounts, dtype=np.float64)
+        index = {code: i for i, code in enumerate(codes)}
+
+        def indices(values: Union[str, Sequence[str]]) -> np.ndarray:
+            if isinstance(values, str):
+                values = [values]
+            try:
+                idx = np.fromiter((index[v.upper()] for v in values), dtype=np.intp)
+            except KeyError as e:
+                raise ValueError(f"Moneda no soportada: {e.args[0]}") from None
+            if idx.size == 1:
+                return np.broadcast_to(idx, amounts_arr.shape)
+            if idx.shape != amounts_arr.shape:
+                raise ValueError("amounts, from_codes y to_codes deben tener el mismo largo")
+            return idx
+
+        return amounts_arr * matrix[indices(from_codes), indices(to_codes)]
+
+
+class AsyncFrankfurterProvider(_RateTableCache):
+    """
+    Versión asíncrona de `FrankfurterProvider` para un event loop: misma caché
+    de tablas y tasas cruzadas, descargas con `AsyncHttpTransport`, coalescencia
+    por base entre corrutinas y refresco de tablas vencidas como tarea.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        pivot: str = PIVOT_CODE,
+        transport: Optional[AsyncHttpTransport] = None,
+        base_url: str = BASE_URL,
+        store: Optional[RateStore] = None,
+    ):
+        super().__init__(ttl=ttl, pivot=pivot, base_url=base_url, store=store)
+        self.transport = transport or AsyncHttpTransport()
+        self._flights = AsyncSingleFlight()
+        self._tasks: set = set()
+
+    async def _fetch_table(self, base: str) -> RateTable:
+        base = base.upper()
+
+        async def download() -> RateTable:
+            table = self._remember(await self.transport.get_json(f"{self.base_url}/{base}"))
+            if self.store is not None:
+                # El almacén toma un flock y sincroniza el mmap: fuera del event loop.
+                await asyncio.to_thread(self._persist, table)
+            return table
+
+        return await self._flights.do(base, download)
+
+    async def _refresh(self, base: str) -> None:
+        ok = False
+        try:
+            await self._fetch_table(base)
+            ok = True
+        except Exception:
+            pass
+        finally:
+            self._refresh_finished(base, ok)
+
+    def _refresh_in_background(self, base: str) -> None:
+        # Llamar con self._lock tomado y desde el event loop.
+        if self._claim_refresh(base):
+            task = asyncio.get_running_loop().create_task(self._refresh(base))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def table(self, base: str) -> RateTable:
+        base = base.upper()
+        return self._cached_table(base) or await self._fetch_table(base)
+
+    async def latest(self, base: str, symbols: List[str]) -> Dict:
+        return self._filter(await self.table(base), base, symbols)
+
+    async def quote(self, from_currency: str, to_currency: str, on: Optional[date] = None) -> Quote:
+        from_code = from_currency.upper()
+        to_code = to_currency.upper()
+        # Las lecturas del almacén local (flock compartido) van en un hilo.
+        if self._is_past(on):
+            return await asyncio.to_thread(self._historical_quote, from_code, to_code, on)
+
+        table = self._cached_pair(from_code, to_code)
+        if table is None:
+            try:
+                table = await self._fetch_table(self.pivot)
+                if table.cross(from_code, to_code) is None:
+                    table = await self._fetch_table(from_code)
+            except Exception:
+                table = await asyncio.to_thread(self._offline_table)
+                if table is None:
+                    raise
+        return self._quote(table, from_code, to_code)
+
+    async def rate(self, from_currency: str, to_currency: str) -> float:
+        return (await self.quote(from_currency, to_currency)).rate
+
+    async def convert(self, amount: float, from_currency: str, to_currency: str) -> float:
+        return amount * await self.rate(from_currency, to_currency)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+
+# Respuestas del upstream que vale la pena reintentar.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    """El circuito está abierto: el upstream falló hace poco y no lo llamamos."""
+
+
+class RetryableStatusError(requests.HTTPError):
+    """Respuesta HTTP transitoria (5xx/429) que se reintenta con backoff."""
+
+
+def _error_kind(e: Exception) -> str:
+    # Etiqueta corta para fx_upstream_errors_total: "status_503", "timeout"...
+    response = getattr(e, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is not None:
+        return f"status_{status}"
+    name = type(e).__name__.lower()
+    if "timeout" in name:
+        return "timeout"
+    if "connect" in name:
+        return "connection"
+    return type(e).__name__
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker mínimo:
+    - closed: deja pasar todo y cuenta fallos consecutivos.
+    - open: tras `failure_threshold` fallos rechaza llamadas durante `reset_timeout`.
+    - half-open: pasado ese tiempo deja pasar una llamada de prueba.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def release_probe(self) -> None:
+        """Libera la llamada de prueba sin veredicto (p. ej. se canceló a medias)."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class SingleFlight:
+    """
+    Coalescencia de llamadas: si N hilos piden la misma clave a la vez, solo el
+    primero ejecuta `fn` y los demás esperan y reciben su resultado (o error).
+    """
+
+    class _Call:
+        def __init__(self) -> None:
+            self.done = threading.Event()
+            self.result: Any = None
+            self.error: Optional[BaseException] = None
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, "SingleFlight._Call"] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = SingleFlight._Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class _LeaderCancelled(Exception):
+    """El líder de un `AsyncSingleFlight` se canceló antes de terminar."""
+
+
+class AsyncSingleFlight:
+    """
+    Igual que `SingleFlight`, pero entre corrutinas de un mismo event loop.
+    Si el líder se cancela (p. ej. se desconectó su cliente), los seguidores
+    no heredan la cancelación: uno de ellos repite la llamada como nuevo líder.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, "asyncio.Future[Any]"] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            call = self._calls.get(key)
+            if call is None:
+                break
+            try:
+                # shield: si un seguidor se cancela no cancela la descarga compartida.
+                return await asyncio.shield(call)
+            except _LeaderCancelled:
+                continue
+
+        call = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            call.set_exception(_LeaderCancelled(key))
+            call.exception()
+            raise
+        except Exception as e:
+            call.set_exception(e)
+            # Evita el aviso "exception was never retrieved" si no hubo seguidores.
+            call.exception()
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+
+class HttpTransport:
+    """
+    Transporte HTTP compartido para las tools:
+    - `requests.Session` con pool de conexiones keep-alive.
+    - Reintentos acotados con backoff exponencial y jitter completo.
+    - Circuit breaker para fallar rápido mientras el upstream está caído.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        retries: int = 2,
+        backoff: float = 0.2,
+        max_backoff: float = 2.0,
+        timeout: float = 20.0,
+        breaker: Optional[CircuitBreaker] = None,
+        upstream: str = "fx",
+    ):
+        self.upstream = upstream  # etiqueta de las métricas de errores
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _sleep_before_retry(self, attempt: int) -> None:
+        # Full jitter: espera aleatoria en [0, min(max_backoff, backoff * 2^n)].
+        time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt))))
+
+    def get_json(self, url: str) -> Dict:
+        if not self.breaker.allow():
+            metrics.upstream_error(self.upstream, "circuit_open")
+            raise CircuitOpenError(f"Circuito abierto: no se llama a {url}")
+
+        with metrics.stage(f"{self.upstream}_http"):
+            return self._get_json(url)
+
+    def _get_json(self, url: str) -> Dict:
+        last_error: Optional[Exception] = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._sleep_before_retry(attempt - 1)
+            try:
+                r = self.session.get(url, timeout=self.timeout)
+                if r.status_code in RETRY_STATUSES:
+                    raise RetryableStatusError(f"{r.status_code} desde {url}", response=r)
+                r.raise_for_status()
+                data = r.json()
+            except (requests.ConnectionError, requests.Timeout, RetryableStatusError) as e:
+                metrics.upstream_error(self.upstream, _error_kind(e))
+                last_error = e
+                continue
+            except Exception as e:
+                # Error del cliente (4xx, JSON inválido): el upstream responde,
+                # así que no cuenta como caída para el breaker.
+                metrics.upstream_error(self.upstream, _error_kind(e))
+                self.breaker.record_success()
+                raise
+            self.breaker.record_success()
+            return data
+
+        self.breaker.record_failure()
+        raise last_error
+
+
+class AsyncHttpTransport:
+    """
+    Equivalente asíncrono de `HttpTransport` sobre `httpx.AsyncClient`: pool
+    de conexiones, reintentos con backoff y jitter, y circuit breaker.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 100,
+        retries: int = 2,
+        backoff: float = 0.2,
+        max_backoff: float = 2.0,
+        timeout: float = 20.0,
+        breaker: Optional[CircuitBreaker] = None,
+        upstream: str = "fx",
+    ):
+        import httpx  # solo la ruta async lo necesita
+
+        self._httpx = httpx
+        self.upstream = upstream
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def get_json(self, url: str) -> Dict:
+        if not self.breaker.allow():
+            metrics.upstream_error(self.upstream, "circuit_open")
+            raise CircuitOpenError(f"Circuito abierto: no se llama a {url}")
+
+        try:
+            with metrics.stage(f"{self.upstream}_http"):
+                return await self._get_json(url)
+        except asyncio.CancelledError:
+            # Sin esto, una prueba half-open cancelada dejaría el circuito
+            # rechazando llamadas para siempre.
+            self.breaker.release_probe()
+            raise
+
+    async def _get_json(self, url: str) -> Dict:
+        httpx = self._httpx
+        last_error: Optional[Exception] = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                delay = min(self.max_backoff, self.backoff * (2 ** (attempt - 1)))
+                await asyncio.sleep(random.uniform(0, delay))
+            try:
+                r = await self.client.get(url)
+                if r.status_code in RETRY_STATUSES:
+                    metrics.upstream_error(self.upstream, f"status_{r.status_code}")
+                    last_error = RetryableStatusError(f"{r.status_code} desde {url}")
+                    continue
+                r.raise_for_status()
+                data = r.json()
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                metrics.upstream_error(self.upstream, _error_kind(e))
+                last_error = e
+                continue
+            except Exception as e:
+                metrics.upstream_error(self.upstream, _error_kind(e))
+                self.breaker.record_success()
+                raise
+            self.breaker.record_success()
+            return data
+
+        self.breaker.record_failure()
+        raise last_error
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
@@ -0,0 +1,262 @@
+# src/ledger.py
+"""
+Conversión en streaming de libros contables en CSV (ingresos, deuda...) a una
+moneda de reporte.
+
+El CSV se lee como generador, por bloques de `chunk_rows` filas: cada bloque
+se convierte con un gather vectorizado sobre la matriz de tasas y se entrega
+como texto CSV antes de leer el siguiente, así que la memoria no depende del
+tamaño del archivo. Las tasas se fijan una sola vez al empezar (una descarga
+de la tabla pivote como mucho), de modo que todo el archivo usa la misma tabla
+aunque la caché se refresque a mitad de camino.
+
+    python -m src.ledger ledger.csv --to USD -o ledger_usd.csv
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import math
+import os
+import re
+import sys
+from datetime import date
+from itertools import islice
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional
+
+import requests
+
+from .fx_provider import FrankfurterProvider
+from .http_transport import CircuitOpenError
+from .rate_store import RateStore
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+# Montos con separador de miles, según el separador decimal del archivo.
+_GROUPED = {
+    ".": re.compile(r"\s*[+-]?\d{1,3}(?:,\d{3})+(?:\.\d+)?\s*"),  # 1,234.56
+    ",": re.compile(r"\s*[+-]?(?:\d+|\d{1,3}(?:\.\d{3})+)(?:,\d+)?\s*"),  # 1.234,56
+}
+DECIMAL_SEPARATORS = tuple(_GROUPED)
+
+
+class LedgerConverter:
+    """
+    Agrega a cada fila del CSV una columna con el monto convertido a `to_code`.
+
+    - `amount_column` / `currency_column`: columnas de monto y moneda de origen.
+    - `output_column`: columna nueva (por defecto `amount_<TO>`).
+    - `decimal`: separador decimal de la columna de montos. Con "." (por
+      defecto) se aceptan números planos ("1234.56", "-80") y miles con coma
+      ("1,234.56"); con "," el formato local ("1.234,56", "80,5"). Cada monto
+      se interpreta igual sin importar las demás filas: "1.234" es 1.234 con
+      "." y 1234 con ",".
+    - Una fila con moneda desconocida o monto ilegible se copia con la columna
+      convertida vacía y se cuenta en `invalid`: el archivo ya se está
+      enviando y no conviene cortarlo a mitad por una fila.
+    """
+
+    def __init__(
+        self,
+        provider: FrankfurterProvider,
+        to_code: str,
+        amount_column: str = "amount",
+        currency_column: str = "currency",
+        output_column: Optional[str] = None,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        decimals: int = 2,
+        decimal: str = ".",
+    ):
+        if decimal not in _GROUPED:
+            raise ValueError(f"Separador decimal no soportado: {decimal!r} (usa '.' o ',')")
+        self.provider = provider
+        self.to_code = to_code.upper()
+        self.amount_column = amount_column
+        self.currency_column = currency_column
+        self.output_column = output_column or f"amount_{self.to_code}"
+        self.chunk_rows = chunk_rows
+        self.decimals = decimals
+        self.decimal = decimal
+        self.rows = 0
+        self.invalid = 0
+        # Fecha y origen ("live"/"snapshot") de la tabla usada, tras el primer bloque.
+        self.as_of: Optional[date] = None
+        self.source: Optional[str] = None
+
+    def _rates_to_target(self):
+        # Vector r[i] = tasa 1 codes[i] -> to_code, más un NaN al final para
+        # las monedas desconocidas (índice -1).
+        import numpy as np
+
+        table = self.provider.pivot_table()
+        self.as_of, self.source = table.as_of, table.source
+        codes, matrix = self.provider.rate_matrix(table=table)
+        index = {code: i for i, code in enumerate(codes)}
+        if self.to_code not in index:
+            raise ValueError(f"Moneda no soportada: {self.to_code}")
+        rates = np.append(matrix[:, index[self.to_code]], np.nan)
+        return index, rates
+
+    def _amount(self, raw: str) -> float:
+        # Un monto, siempre con la misma regla; NaN si no se puede leer.
+        if self.decimal == ".":
+            try:
+                return float(raw)
+            except ValueError:
+                pass
+            if _GROUPED["."].fullmatch(raw):
+                return float(raw.replace(",", ""))
+        elif _GROUPED[","].fullmatch(raw):
+            return float(raw.replace(".", "").replace(",", "."))
+        return math.nan
+
+    def _amounts(self, raw: List[str]) -> "np.ndarray":
+        import numpy as np
+
+        amounts = None
+        if self.decimal == ".":
+            try:
+                # Camino rápido: el mismo float() que `_amount`, vectorizado.
+                amounts = np.array(raw, dtype=np.float64)
+            except ValueError:
+                pass
+        if amounts is None:
+            amounts = np.fromiter(map(self._amount, raw), dtype=np.float64, count=len(raw))
+        amounts[~np.isfinite(amounts)] = np.nan  # "inf", "nan"
+        return amounts
+
+    def convert(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        Genera el CSV convertido por bloques de texto (el primero incluye el
+        encabezado). Lanza ValueError en el primer `next()` si faltan columnas.
+        """
+        import numpy as np
+
+        reader = csv.reader(lines)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError("El CSV está vacío.")
+        missing = [c for c in (self.amount_column, self.currency_column) if c not in header]
+        if missing:
+            raise ValueError(f"Faltan columnas en el CSV: {missing}")
+        amount_at = header.index(self.amount_column)
+        currency_at = header.index(self.currency_column)
+
+        index, rates = self._rates_to_target()
+        # Código tal como viene en el archivo -> columna. Se memoizan solo las
+        # variantes válidas (" usd", "Usd"...) y con tope, para que un archivo
+        # con miles de códigos distintos no haga crecer la memoria.
+        lookup: Dict[str, int] = dict(index)
+        lookup_cap = 4 * len(index)
+        fmt = f"{{:.{self.decimals}f}}".format
+
+        width = len(header)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(header + [self.output_column])
+
+        while True:
+            chunk = list(islice(reader, self.chunk_rows))
+            if not chunk:
+                break
+            chunk = [row for row in chunk if row]  # líneas en blanco
+            if min(map(len, chunk), default=width) < width:
+                for row in chunk:
+                    row.extend([""] * (width - len(row)))
+
+            get = lookup.get
+            columns = [get(row[currency_at]) for row in chunk]
+            if None in columns:
+                for i, column in enumerate(columns):
+                    if column is None:
+                        code = chunk[i][currency_at]
+                        columns[i] = index.get(code.strip().upper(), -1)
+                        if columns[i] >= 0 and len(lookup) < lookup_cap:
+                            lookup[code] = columns[i]
+
+            converted = self._amounts([row[amount_at] for row in chunk]) * rates[np.array(columns, dtype=np.intp)]
+            values = [fmt(v) if v == v else "" for v in converted.tolist()]
+            for row, value in zip(chunk, values):
+                row.append(value)
+
+            self.rows += len(chunk)
+            self.invalid += values.count("")
+            writer.writerows(chunk)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        tail = buffer.getvalue()
+        if tail:
+            yield tail
+
+
+def decode_lines(stream, encoding: str = "utf-8-sig") -> Iterable[str]:
+    """Líneas de texto de un stream binario (subida HTTP, archivo, stdin), sin cargarlo entero."""
+    return io.TextIOWrapper(stream, encoding=encoding, newline="")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(
+        description="Convierte un libro contable CSV a una moneda de reporte.",
+        epilog="Códigos de salida: 2 si el CSV o los parámetros no sirven, 3 si no hay tasas de cambio.",
+    )
+    ap.add_argument("input", help="CSV de entrada ('-' para stdin)")
+    ap.add_argument("--to", required=True, help="moneda de reporte, p. ej. USD")
+    ap.add_argument("-o", "--output", help="CSV de salida (por defecto stdout)")
+    ap.add_argument("--amount-column", default="amount")
+    ap.add_argument("--currency-column", default="currency")
+    ap.add_argument("--output-column")
+    ap.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    ap.add_argument("--decimals", type=int, default=2)
+    ap.add_argument(
+        "--decimal", choices=DECIMAL_SEPARATORS, default=".",
+        help="separador decimal de los montos ('.' -> 1,234.56; ',' -> 1.234,56)",
+    )
+    args = ap.parse_args(argv)
+
+    provider = FrankfurterProvider(store=RateStore(os.getenv("FX_STORE_DIR", "data/fx_store")))
+    converter = LedgerConverter(
+        provider,
+        args.to,
+        amount_column=args.amount_column,
+        currency_column=args.currency_column,
+        output_column=args.output_column,
+        chunk_rows=args.chunk_rows,
+        decimals=args.decimals,
+        decimal=args.decimal,
+    )
+
+    source = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    target = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        for block in converter.convert(decode_lines(source)):
+            target.write(block)
+    except (ValueError, csv.Error) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    except (requests.RequestException, CircuitOpenError) as e:
+        # Sin API y sin tabla guardada a la cual recurrir (el 502 del endpoint).
+        print(f"error: No pude obtener las tasas de cambio. Detalle técnico: {e}", file=sys.stderr)
+        return 3
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+    as_of = converter.as_of.isoformat() if converter.as_of else "fecha desconocida"
+    print(
+        f"{converter.rows} filas convertidas a {converter.to_code} ({converter.invalid} sin convertir)"
+        f" con tasas del {as_of} ({converter.source})",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,16 +2,81 @@
 from __future__ import annotations
 
 import os
-from groq import Groq  # pip install groq
+import threading
+from typing import Iterator
 
+MODEL = "llama-3.1-8b-instant"  # puedes cambiarlo si usas otro
+TEMPERATURE = 0.3
+MAX_TOKENS = 250
+SYSTEM_PROMPT = (
+    "Eres un analista financiero del sector energía y recursos,"
+    "trabajando en una empresa de consultoría para el sector BFSI."
+    "Respondes SIEMPRE en español, de forma clara y concisa, "
+    "en 3 a 10 frases como máximo."
+    "Cuando expliques conceptos (como tasa de cambio o riesgo cambiario),"
+    "usa ejemplos de proyectos del sector energía o recursos."
+    "(por ejemplo parques eólicos, proyectos solares, minería, petróleo y gas) "
+    "y evita listas largas."
+)
+
+
+class LLMUnavailableError(RuntimeError):
+    """No hay cliente de Groq disponible (falta GROQ_API_KEY)."""
+
+
+# El SDK de Groq (groq/httpx/pydantic) es caro de importar: se carga y se
+# construye el cliente recién con la primera pregunta conceptual.
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+
+def is_configured() -> bool:
+    """True si hay API key para el LLM; no importa el SDK."""
+    return bool(os.getenv("GROQ_API_KEY"))
+
+
+def _api_key() -> str:
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise LLMUnavailableError(
+            "Falta la variable de entorno GROQ_API_KEY para usar el LLM de Groq."
+        )
+    return api_key
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from groq import Groq  # pip install groq
+
+                _client = Groq(api_key=_api_key())
+    return _client
+
+
+def _get_async_client():
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                from groq import AsyncGroq
+
+                _async_client = AsyncGroq(api_key=_api_key())
+    return _async_client
 
-_api_key = os.getenv("GROQ_API_KEY")
-if not _api_key:
-    raise RuntimeError(
-        "Falta la variable de entorno GROQ_API_KEY para usar el LLM de Groq."
-    )
 
-_client = Groq(api_key=_api_key)
+def _completion_args(question: str) -> dict:
+    return dict(
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": question},
+        ],
+        temperature=TEMPERATURE,
+        max_tokens=MAX_TOKENS,
+    )
 
 
 def ask_llm(question: str) -> str:
@@ -19,25 +84,25 @@ def ask_llm(question: str) -> str:
     Envía la pregunta a un modelo de Groq y devuelve una respuesta breve en español
     con enfoque BFSI / energía.
     """
-    resp = _client.chat.completions.create(
-        model="llama-3.1-8b-instant",  # puedes cambiarlo si usas otro
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "Eres un analista financiero del sector energía y recursos,"
-                    "trabajando en una empresa de consultoría para el sector BFSI."
-                    "Respondes SIEMPRE en español, de forma clara y concisa, " 
-                    "en 3 a 10 frases como máximo."
-                    "Cuando expliques conceptos (como tasa de cambio o riesgo cambiario),"
-                    "usa ejemplos de proyectos del sector energía o recursos."
-                    "(por ejemplo parques eólicos, proyectos solares, minería, petróleo y gas) "
-                    "y evita listas largas."
-                ),
-            },
-            {"role": "user", "content": question},
-        ],
-        temperature=0.3,
-        max_tokens=250,
-    )
+    resp = _get_client().chat.completions.create(**_completion_args(question))
     return resp.choices[0].message.content.strip()
+
+
+async def ask_llm_async(question: str) -> str:
+    """Igual que `ask_llm`, sin bloquear el event loop mientras responde Groq."""
+    resp = await _get_async_client().chat.completions.create(**_completion_args(question))
+    return resp.choices[0].message.content.strip()
+
+
+def stream_llm(question: str) -> Iterator[str]:
+    """
+    Igual que `ask_llm`, pero con `stream=True`: devuelve los fragmentos de
+    texto a medida que Groq los genera.
+    """
+    stream = _get_client().chat.completions.create(stream=True, **_completion_args(question))
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
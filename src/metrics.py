@@ -0,0 +1,290 @@
+# src/metrics.py
+"""
+Instrumentación mínima, sin dependencias: histogramas y contadores en memoria,
+un context manager `stage()` para medir cada etapa de una respuesta y salida en
+formato de texto de Prometheus.
+
+    with metrics.stage("fx"):
+        quote = provider.quote(...)
+
+Cada etapa se acumula en el histograma `fx_stage_seconds{stage=...}` y, si hay
+una petición en curso (`begin_request`), también en su lista de tiempos, que
+`app.py` publica en la cabecera `Server-Timing`.
+
+Con `FX_METRICS=0` (o `set_enabled(False)`) `stage()` devuelve un context
+manager vacío compartido: no toma el reloj, no bloquea y no asigna memoria.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Segundos: desde el parser (µs) hasta el LLM (segundos).
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_enabled = os.getenv("FX_METRICS", "1") != "0"
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(value: bool) -> None:
+    global _enabled
+    _enabled = value
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Histogram:
+    """Histograma con buckets fijos por combinación de etiquetas."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # etiquetas -> [conteo por bucket (no acumulado) + desborde, suma, total]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Tuple[List[int], float, int]]:
+        with self._lock:
+            return {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labelvalues, (counts, total, count) in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="{}"'.format("+Inf" if bound == float("inf") else _number(bound))
+                yield f"{self.name}_bucket{_labels(self.labelnames, labelvalues, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labelvalues)} {total!r}"
+            yield f"{self.name}_count{_labels(self.labelnames, labelvalues)} {count}"
+
+
+class Counter:
+    """Contador monótono por combinación de etiquetas."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        with self._lock:
+            return self._values.get(labelvalues, 0.0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            yield f"{self.name}{_labels(self.labelnames, labelvalues)} {_number(value)}"
+
+
+class Gauge:
+    """Valor leído en cada scrape desde `collect()` -> [(etiquetas, valor)]."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Iterable[Tuple[Sequence[str], float]]],
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        for labelvalues, value in self.collect():
+            yield f"{self.name}{_labels(self.labelnames, labelvalues)} {_number(value)}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str], collect) -> Gauge:
+        """Registra (o reemplaza) un gauge calculado en cada scrape."""
+        return self._add(Gauge(name, help, labelnames, collect))
+
+    def render(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus (v0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "fx_stage_seconds", "Duración de cada etapa de una respuesta.", ("stage",)
+)
+ANSWER_SECONDS = REGISTRY.histogram(
+    "fx_answer_seconds", "Duración total de CurrencyAgent.answer según la ruta tomada.", ("route",)
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "fx_http_request_seconds", "Duración de las peticiones HTTP por endpoint.", ("endpoint", "status")
+)
+UPSTREAM_ERRORS = REGISTRY.counter(
+    "fx_upstream_errors_total", "Errores al llamar a las APIs externas.", ("upstream", "kind")
+)
+
+
+def register_service_gauges(provider, answer_cache) -> None:
+    """
+    Gauges de un servidor (`app.py` o `asgi.py`): hit ratio de la caché de
+    tasas y de la del LLM, y si el circuit breaker de la API de FX está abierto.
+    """
+    REGISTRY.gauge(
+        "fx_cache_hit_ratio",
+        "Proporción de aciertos de cada caché.",
+        ("cache",),
+        lambda: [
+            (("rates",), provider.cache_stats()["hit_ratio"]),
+            (("llm_answers",), answer_cache.stats()["hit_ratio"]),
+        ],
+    )
+    REGISTRY.gauge(
+        "fx_upstream_circuit_open",
+        "1 si el circuit breaker del upstream está abierto.",
+        ("upstream",),
+        lambda: [(("fx",), 1.0 if provider.transport.breaker.state == "open" else 0.0)],
+    )
+
+
+# ----------------------------------------------------------------------
+# Etapas y tiempos por petición
+# ----------------------------------------------------------------------
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("fx_request_timings", default=None)
+
+
+class _NoopStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_NOOP = _NoopStage()
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc) -> bool:
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def stage(name: str):
+    """Context manager que mide la etapa `name` (no-op si las métricas están apagadas)."""
+    if not _enabled:
+        return _NOOP
+    return _Stage(name)
+
+
+def record(name: str, seconds: float) -> None:
+    """Registra una etapa medida por fuera de `stage()`."""
+    STAGE_SECONDS.observe(seconds, name)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+def observe_answer(route: str, seconds: float) -> None:
+    if _enabled:
+        ANSWER_SECONDS.observe(seconds, route)
+
+
+def upstream_error(upstream: str, kind: str) -> None:
+    # Los errores se cuentan aunque las métricas estén apagadas: son raros y
+    # baratos, y así /metrics no pierde incidentes.
+    UPSTREAM_ERRORS.inc(upstream, kind)
+
+
+def begin_request() -> None:
+    """Empieza a juntar los tiempos de etapa de la petición actual (hilo o tarea)."""
+    _request_timings.set([])
+
+
+def end_request() -> List[Tuple[str, float]]:
+    """Tiempos juntados desde `begin_request`, en orden; deja de juntar."""
+    timings = _request_timings.get() or []
+    _request_timings.set(None)
+    return timings
+
+
+def server_timing(timings: Iterable[Tuple[str, float]], total: Optional[float] = None) -> str:
+    """Valor de la cabecera `Server-Timing` (ms); suma las etapas repetidas."""
+    merged: Dict[str, float] = {}
+    for name, seconds in timings:
+        merged[name] = merged.get(name, 0.0) + seconds
+    if total is not None:
+        merged["total"] = total
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in merged.items())
@@ -0,0 +1,239 @@
+# src/rate_store.py
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import threading
+from array import array
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .extractor import ISO_CODES
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+_ITEM = 8  # bytes por float64
+
+
+class RateStore:
+    """
+    Serie de tiempo local de tasas: un archivo de float64 mapeado en memoria
+    (`rates.f8`) con una fila por día y una columna por moneda, más `meta.json`
+    con las columnas y la fecha de la primera fila.
+
+    Cada celda guarda unidades de la moneda por 1 USD; 0.0 significa "sin dato"
+    (ninguna tasa real vale cero y así los días nuevos, que el sistema de
+    archivos rellena con ceros, quedan vacíos sin escribirlos).
+
+    Leer un día es una rebanada del mapa de memoria: no hay red ni parseo, así
+    que sirve para consultas fechadas, como respaldo sin conexión y para
+    arrancar un proceso nuevo con la última tabla conocida.
+
+    Varios procesos pueden compartir el directorio (workers de gunicorn, la app
+    y el CLI de ledger): cada operación toma un `flock` sobre `.lock`
+    (exclusivo para escribir, compartido para leer) y, si otro proceso cambió
+    `meta.json`, vuelve a leerlo y remapea el archivo antes de seguir. El
+    archivo solo se reemplaza (nunca se trunca a menos) para que un mapa viejo
+    en otro proceso no quede apuntando fuera del archivo.
+    """
+
+    def __init__(self, path: str, codes: Iterable[str] = ISO_CODES, pivot: str = "USD"):
+        self.path = path
+        self.pivot = pivot.upper()
+        self._lock = threading.Lock()
+        self._data_path = os.path.join(path, "rates.f8")
+        self._meta_path = os.path.join(path, "meta.json")
+        os.makedirs(path, exist_ok=True)
+
+        self.codes = sorted({code.upper() for code in codes} | {self.pivot})
+        self._column = {code: i for i, code in enumerate(self.codes)}
+        self.start: Optional[date] = None
+        self.rows = 0
+        self.last_day: Optional[date] = None
+
+        self._file = None
+        self._mm: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+        self._meta_stamp: Optional[Tuple[int, int, int]] = None
+        self._lock_file = None
+        self._lock_pid = 0
+        with self._locked(exclusive=False):
+            pass  # adopta el meta.json existente
+
+    # ------------------------------------------------------------------
+    # Archivo mapeado
+    # ------------------------------------------------------------------
+    def _open(self) -> None:
+        self._file = open(self._data_path, "r+b")
+        self._mm = mmap.mmap(self._file.fileno(), self.rows * len(self.codes) * _ITEM)
+        self._view = memoryview(self._mm).cast("d")
+
+    def _close(self) -> None:
+        if self._view is not None:
+            self._view.release()
+            self._mm.close()
+            self._file.close()
+        self._view = self._mm = self._file = None
+
+    @contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        """Bloqueo entre hilos y entre procesos, con el mapa ya sincronizado."""
+        with self._lock:
+            if fcntl is None:
+                self._sync()
+                yield
+                return
+            if self._lock_pid != os.getpid():
+                # Un descriptor heredado por fork compartiría el flock con el padre.
+                self._lock_file = open(os.path.join(self.path, ".lock"), "a+b")
+                self._lock_pid = os.getpid()
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                self._sync(force=exclusive)
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _sync(self, force: bool = False) -> None:
+        # Llamar con self._lock tomado. Adopta el meta.json si otro proceso lo
+        # cambió; los escritores lo releen siempre (el sello de stat es barato
+        # pero podría repetirse si el sistema de archivos reusa el inodo).
+        try:
+            st = os.stat(self._meta_path)
+        except FileNotFoundError:
+            return
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if stamp == self._meta_stamp and not force:
+            return
+        with open(self._meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        self._meta_stamp = stamp
+        start = date.fromisoformat(meta["start"]) if meta["start"] else None
+        self.last_day = date.fromisoformat(meta["last_day"]) if meta.get("last_day") else None
+        if (meta["codes"], start, meta["rows"]) != (self.codes, self.start, self.rows) or self._view is None:
+            self._close()
+            self.codes = meta["codes"]
+            self._column = {code: i for i, code in enumerate(self.codes)}
+            self.start = start
+            self.rows = meta["rows"]
+            if self.rows:
+                self._open()
+
+    def _write_meta(self) -> None:
+        meta = {
+            "codes": self.codes,
+            "start": self.start.isoformat() if self.start else None,
+            "rows": self.rows,
+            "last_day": self.last_day.isoformat() if self.last_day else None,
+        }
+        tmp = self._meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path)
+        st = os.stat(self._meta_path)
+        self._meta_stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _ensure_row(self, day: date) -> int:
+        # Llamar con self._lock tomado. Crece el archivo para que `day` tenga fila.
+        width = len(self.codes) * _ITEM
+        if self.start is None:
+            self.start = day
+        if day < self.start:
+            # Día anterior al inicio: reescribimos con filas vacías delante.
+            shift = (self.start - day).days
+            old = bytes(self._mm) if self._mm is not None else b""
+            self._close()
+            tmp = self._data_path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(b"\0" * shift * width)
+                f.write(old)
+            os.replace(tmp, self._data_path)
+            self.start = day
+            self.rows += shift
+            self._open()
+        index = (day - self.start).days
+        if index >= self.rows:
+            # Crecemos por bloques de un año para no remapear cada día.
+            new_rows = max(index + 1, self.rows + 366)
+            self._close()
+            with open(self._data_path, "ab") as f:
+                f.truncate(new_rows * width)
+            self.rows = new_rows
+            self._open()
+        return index
+
+    def _row(self, index: int) -> memoryview:
+        n = len(self.codes)
+        return self._view[index * n : (index + 1) * n]
+
+    def _to_dict(self, values: List[float]) -> Dict[str, float]:
+        return {code: v for code, v in zip(self.codes, values) if v}
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def put(self, day: date, base_code: str, rates: Dict[str, float]) -> None:
+        """Guarda la tabla del día `day` (con cualquier base) normalizada a USD."""
+        pivot = rates.get(self.pivot)
+        if not pivot:
+            return
+        with self._locked(exclusive=True):
+            # Después de sincronizar: las columnas son las del archivo.
+            values = array("d", bytes(len(self.codes) * _ITEM))
+            for code, rate in rates.items():
+                column = self._column.get(code)
+                if column is not None:
+                    values[column] = rate / pivot
+            index = self._ensure_row(day)
+            self._row(index)[:] = values
+            self._mm.flush()
+            if self.last_day is None or day > self.last_day:
+                self.last_day = day
+            self._write_meta()
+
+    def get(self, day: date) -> Optional[Dict[str, float]]:
+        """Tabla exacta de `day` (por 1 USD) o None si no hay dato."""
+        with self._locked(exclusive=False):
+            return self._get(day)
+
+    def _get(self, day: date) -> Optional[Dict[str, float]]:
+        # Llamar con self._locked tomado.
+        if self.start is None or not (0 <= (day - self.start).days < self.rows):
+            return None
+        return self._to_dict(self._row((day - self.start).days).tolist()) or None
+
+    def _nearest(self, day: date, max_days_back: int) -> Optional[Tuple[date, Dict[str, float]]]:
+        # Llamar con self._locked tomado.
+        for back in range(max_days_back + 1):
+            candidate = day - timedelta(days=back)
+            if self.start is None or candidate < self.start:
+                return None
+            rates = self._get(candidate)
+            if rates:
+                return candidate, rates
+        return None
+
+    def nearest(self, day: date, max_days_back: int = 31) -> Optional[Tuple[date, Dict[str, float]]]:
+        """Última tabla guardada en o antes de `day` (hasta `max_days_back` días atrás)."""
+        with self._locked(exclusive=False):
+            return self._nearest(day, max_days_back)
+
+    def latest(self) -> Optional[Tuple[date, Dict[str, float]]]:
+        """Última tabla guardada, para arranque en caliente o modo sin conexión."""
+        with self._locked(exclusive=False):
+            if self.last_day is None:
+                return None
+            return self._nearest(self.last_day, 31)
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+                self._lock_pid = 0
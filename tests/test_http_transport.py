@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from bench.stubs import FxStubServer
+from src.http_transport import (
+    AsyncHttpTransport,
+    AsyncSingleFlight,
+    CircuitBreaker,
+    CircuitOpenError,
+    HttpTransport,
+    RetryableStatusError,
+    SingleFlight,
+)
+
+
+@pytest.fixture
+def fx():
+    with FxStubServer() as stub:
+        yield stub
+
+
+def test_breaker_opens_then_half_open_probe_closes_it(fx):
+    transport = HttpTransport(retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=0.05))
+    url = f"{fx.base_url}/USD"
+
+    fx.down = True
+    for _ in range(2):
+        with pytest.raises(RetryableStatusError):
+            transport.get_json(url)
+    assert transport.breaker.state == "open"
+
+    # Abierto: falla rápido sin llegar al upstream.
+    with pytest.raises(CircuitOpenError):
+        transport.get_json(url)
+    assert fx.requests == 2
+
+    # Una prueba half-open fallida vuelve a abrir el circuito.
+    time.sleep(0.06)
+    assert transport.breaker.state == "half-open"
+    with pytest.raises(RetryableStatusError):
+        transport.get_json(url)
+    assert transport.breaker.state == "open"
+
+    time.sleep(0.06)
+    fx.down = False
+    assert transport.get_json(url)["base_code"] == "USD"
+    assert transport.breaker.state == "closed"
+    assert fx.requests == 4
+
+
+def test_single_flight_coalesces_concurrent_threads(fx):
+    transport = HttpTransport(retries=0)
+    flight = SingleFlight()
+    url = f"{fx.base_url}/USD"
+    fx.latency = 0.2
+
+    n = 8
+    barrier = threading.Barrier(n)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(flight.do("USD", lambda: transport.get_json(url)))
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert fx.requests == 1
+    assert len(results) == n
+    assert all(r == results[0] and r["base_code"] == "USD" for r in results)
+
+
+def test_async_single_flight_survives_cancelled_leader(fx):
+    async def scenario():
+        transport = AsyncHttpTransport(retries=0)
+        flight = AsyncSingleFlight()
+        url = f"{fx.base_url}/USD"
+        fx.latency = 0.2
+        try:
+            leader = asyncio.ensure_future(flight.do("USD", lambda: transport.get_json(url)))
+            await asyncio.sleep(0)
+            followers = asyncio.gather(*(flight.do("USD", lambda: transport.get_json(url)) for _ in range(3)))
+            await asyncio.sleep(0.05)
+            leader.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+
+            # Los seguidores no heredan la cancelación: uno repite la descarga.
+            results = await followers
+            assert [r["base_code"] for r in results] == ["USD"] * 3
+            assert fx.requests == 2
+        finally:
+            await transport.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_half_open_probe_releases_the_breaker(fx):
+    async def scenario():
+        transport = AsyncHttpTransport(retries=0, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0.05))
+        url = f"{fx.base_url}/USD"
+        try:
+            fx.down = True
+            with pytest.raises(Exception):
+                await transport.get_json(url)
+            assert transport.breaker.state == "open"
+
+            fx.down, fx.latency = False, 1.0
+            await asyncio.sleep(0.06)
+            probe = asyncio.ensure_future(transport.get_json(url))
+            await asyncio.sleep(0.05)
+            probe.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await probe
+
+            fx.latency = 0.0
+            data = await transport.get_json(url)
+            assert data["base_code"] == "USD"
+            assert transport.breaker.state == "closed"
+        finally:
+            await transport.aclose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,78 @@
+import math
+from datetime import date
+
+import pytest
+
+from src import ledger
+from src.fx_provider import FrankfurterProvider, RateTable
+from src.http_transport import HttpTransport
+from src.ledger import LedgerConverter
+
+
+class _FixedProvider(FrankfurterProvider):
+    """Proveedor sin red: 1 USD = 4000 COP = 0.9 EUR."""
+
+    def pivot_table(self):
+        rates = {"USD": 1.0, "COP": 4000.0, "EUR": 0.9}
+        return RateTable("USD", rates, fetched_at=0.0, expires_at=0.0, as_of=date(2026, 10, 16), source="snapshot")
+
+
+def _amounts(raw, decimal="."):
+    return LedgerConverter(_FixedProvider(), "USD", decimal=decimal)._amounts(raw).tolist()
+
+
+def test_amount_does_not_depend_on_other_rows():
+    # Antes "1.234" era 1.234 o 1234 según si el bloque traía "1.000,50".
+    assert _amounts(["1.234", "5"])[0] == _amounts(["1.234", "1.000,50"])[0] == 1.234
+
+
+def test_plain_format_rejects_local_amounts():
+    values = _amounts(["1,234.56", "1.000,50", "80,5", "inf", ""])
+    assert values[0] == 1234.56
+    assert all(math.isnan(v) for v in values[1:])
+
+
+def test_comma_decimal_format():
+    values = _amounts(["1.234", "1.000,50", "-80,5", "12.34", "5"], decimal=",")
+    assert values[:3] == [1234.0, 1000.5, -80.5]
+    assert math.isnan(values[3])
+    assert values[4] == 5.0
+
+
+def test_unknown_decimal_separator():
+    with pytest.raises(ValueError):
+        LedgerConverter(_FixedProvider(), "USD", decimal=";")
+
+
+def test_convert_marks_unreadable_rows():
+    converter = LedgerConverter(_FixedProvider(), "USD", chunk_rows=2)
+    lines = ["amount,currency\n", "4000,COP\n", "\"1.000,50\",EUR\n", "9,XXX\n", "1.8,EUR\n"]
+    out = "".join(converter.convert(lines)).splitlines()
+    assert out[0] == "amount,currency,amount_USD"
+    assert out[1] == "4000,COP,1.00"
+    assert out[-1] == "1.8,EUR,2.00"
+    assert (converter.rows, converter.invalid) == (4, 2)
+    assert (converter.as_of, converter.source) == (date(2026, 10, 16), "snapshot")
+
+
+def test_unknown_codes_and_code_variants():
+    converter = LedgerConverter(_FixedProvider(), "USD", chunk_rows=100)
+    lines = ["amount,currency\n"] + [f"1,X{i}\n" for i in range(1000)] + ["4000, cop\n"]
+    out = "".join(converter.convert(lines)).splitlines()
+    assert out[-1] == "4000, cop,1.00"
+    assert (converter.rows, converter.invalid) == (1001, 1000)
+
+
+def test_cli_reports_unreachable_upstream(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("FX_STORE_DIR", str(tmp_path / "store"))
+    monkeypatch.setattr(
+        ledger,
+        "FrankfurterProvider",
+        lambda store: FrankfurterProvider(
+            base_url="http://127.0.0.1:9", transport=HttpTransport(retries=0), store=store
+        ),
+    )
+    source = tmp_path / "ledger.csv"
+    source.write_text("amount,currency\n1,EUR\n", encoding="utf-8")
+    assert ledger.main([str(source), "--to", "USD", "-o", str(tmp_path / "out.csv")]) == 3
+    assert capsys.readouterr().err.startswith("error: No pude obtener las tasas de cambio")
@@ -0,0 +1,48 @@
+from datetime import date
+
+import pytest
+
+from bench.parser_corpus import CONCEPT_CORPUS, CORPUS
+from src.currency_agent import InvalidDateError, Parser
+
+TODAY = date(2026, 10, 17)
+
+
+@pytest.fixture(scope="module")
+def parser():
+    return Parser()
+
+
+@pytest.mark.parametrize("question, expected", CORPUS)
+def test_parse(parser, question, expected):
+    assert parser.parse(question) == expected
+
+
+@pytest.mark.parametrize("question, expected", CONCEPT_CORPUS)
+def test_is_conceptual(parser, question, expected):
+    assert parser.is_conceptual(question) is expected
+
+
+@pytest.mark.parametrize(
+    "question, expected",
+    [
+        ("¿Cuánto eran 100 USD en COP ayer?", date(2026, 10, 16)),
+        ("100 usd a cop el 15/10/2026", date(2026, 10, 15)),
+        ("100 usd a cop hoy", None),
+        ("100 usd a cop", None),
+    ],
+)
+def test_parse_full_dates(parser, question, expected):
+    parsed, on = parser.parse_full(question, today=TODAY)
+    assert parsed == (100.0, "USD", "COP")
+    assert on == expected
+
+
+@pytest.mark.parametrize("question", ["100 usd a cop 31/02/2026", "100 usd a cop 2027-01-05"])
+def test_parse_full_rejects_impossible_dates(parser, question):
+    with pytest.raises(InvalidDateError):
+        parser.parse_full(question, today=TODAY)
+
+
+def test_invalid_date_in_conceptual_question_is_ignored(parser):
+    assert parser.parse_full("¿Qué pasó con el dólar el 31/02/2026?", today=TODAY) == (None, None)